@@ -335,6 +335,14 @@ if !errorlevel! equ 0 (
         echo [WARNING] pillow-heif installation failed. HEIC might not work.
     )
     
+    echo [INFO] Installing numpy (Smart Quality metrics)...
+    pip install --quiet numpy
+    if !errorlevel! equ 0 (
+        echo [OK] numpy installed successfully!
+    ) else (
+        echo [WARNING] numpy installation failed. Smart Mode will use slower metrics.
+    )
+    
     echo [INFO] Installing watchdog (Watch Mode)...
     pip install --quiet watchdog
     if !errorlevel! equ 0 (
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+"""
+DeltaSync benchmark: the hash phase of a no-op re-run over many unchanged files.
+
+Compares the original scheme (MD5 of every file in 64KB chunks, on every run)
+with the current get_hash(): a cold run that reads each file once to fill the
+stat index, and the warm no-op re-run that only looks digests up by
+(path, size, mtime_ns, inode). Files are random bytes, written once and served
+from the page cache, so the read cases are a lower bound for real disks.
+
+    python benchmarks/bench_deltasync.py [--count 10000] [--size-kb 200]
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+def make_files(folder, count, size):
+    data = os.urandom(size)
+    for i in range(count):
+        # Distinct content per file without paying for count * size of urandom
+        with open(os.path.join(folder, f"img_{i:05d}.jpg"), "wb") as f:
+            f.write(i.to_bytes(8, "little") + data[8:])
+
+def md5_full_read(path):
+    """The pre-stat-index get_hash(): the whole file, every run"""
+    hasher = hashlib.md5()
+    with open(path, "rb") as f:
+        while chunk := f.read(65536):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def timed(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000, help="files in the batch")
+    parser.add_argument("--size-kb", type=int, default=200, help="size of each file")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="tq_deltasync_")
+    try:
+        os.chdir(folder)
+        sys.path.insert(0, SRC_DIR)
+        import terminallyquick as tq
+
+        inputs = os.path.join(folder, "inputs")
+        os.makedirs(inputs)
+        make_files(inputs, args.count, args.size_kb * 1024)
+        settings = {"name": "Bench", "format": "WEBP", "size": 1200, "quality": 85}
+        # Identities come from the probe pass in a real run, so they are not timed here
+        files = []
+        for name in sorted(os.listdir(inputs)):
+            path = os.path.join(inputs, name)
+            st = os.stat(path)
+            files.append((path, (st.st_size, st.st_mtime_ns, st.st_ino)))
+
+        cases = {
+            "MD5 full read (before)": lambda item: md5_full_read(item[0]),
+            "get_hash, cold stat index": lambda item: tq.DeltaSync.get_hash(item[0], settings, item[1]),
+            "get_hash, no-op re-run": lambda item: tq.DeltaSync.get_hash(item[0], settings, item[1]),
+        }
+        total_mb = args.count * args.size_kb / 1024
+        print(f"{args.count} files x {args.size_kb} KB ({total_mb:.0f} MB), hash phase only")
+        print(f"{'case':<28} {'seconds':>8} {'us/file':>8}")
+        for name, func in cases.items():
+            seconds = timed(func, files)
+            print(f"{name:<28} {seconds:>8.2f} {seconds / args.count * 1e6:>8.1f}")
+        tq.DeltaSync.close()
+    finally:
+        os.chdir(os.path.dirname(folder))
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
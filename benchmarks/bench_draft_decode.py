@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+"""
+Draft decode check: reduced-DCT-scale JPEG decode versus full decode.
+
+Renders each target size from a large JPEG twice, through the pipeline's
+resize_to_short_edge(): once from a full decode and once after
+apply_draft_decode(). Reports the decode + resize time of both and the pixel
+difference between the outputs (per-channel RMS, 0-255). Exits 1 if any
+output differs in size or its RMS exceeds --max-rms (by default the RMS
+threshold Smart Optimize treats as visually identical).
+
+    python benchmarks/bench_draft_decode.py [--size 6000x4000] [--targets 400,800,1200]
+"""
+
+import argparse
+import io
+import math
+import os
+import sys
+import time
+
+from PIL import Image, ImageChops, ImageStat
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+def make_source(size):
+    """Photo-like JPEG: fractal detail in one channel, gradients in the others"""
+    width, height = size
+    detail = Image.effect_mandelbrot((width, height), (-2.0, -1.2, 0.8, 1.2), 160)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    buf = io.BytesIO()
+    Image.merge("RGB", (detail, gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT))).save(buf, format="JPEG", quality=92)
+    return buf.getvalue()
+
+def render(tq, data, target, draft):
+    """Decode + resize as process_item does; returns (image, seconds)"""
+    start = time.perf_counter()
+    with Image.open(io.BytesIO(data)) as img:
+        width, height = img.size
+        if draft:
+            tq.apply_draft_decode(img, target)
+        img.load()
+        out, _, _ = tq.resize_to_short_edge(img, width, height, target, False)
+    return out, time.perf_counter() - start
+
+def rms(a, b):
+    return math.sqrt(sum(v * v for v in ImageStat.Stat(ImageChops.difference(a, b)).rms) / 3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="6000x4000", help="source dimensions, WxH")
+    parser.add_argument("--targets", default="400,800,1200", help="target short edges")
+    parser.add_argument("--max-rms", type=float, help="fail above this RMS (default: Smart Optimize's rms threshold)")
+    args = parser.parse_args()
+    sys.path.insert(0, SRC_DIR)
+    import terminallyquick as tq
+
+    max_rms = args.max_rms if args.max_rms is not None else tq.METRIC_THRESHOLDS["rms"]
+    size = tuple(int(x) for x in args.size.lower().split("x"))
+    data = make_source(size)
+    print(f"Source {size[0]}x{size[1]} JPEG, fail above RMS {max_rms}")
+    print(f"{'target':>6} {'full ms':>8} {'draft ms':>9} {'speedup':>8} {'RMS':>6}  result")
+    failures = []
+    for target in (int(t) for t in args.targets.split(",")):
+        full, full_s = render(tq, data, target, draft=False)
+        drafted, draft_s = render(tq, data, target, draft=True)
+        if full.size != drafted.size:
+            failures.append(f"{target}px: draft output {drafted.size} != full {full.size}")
+            continue
+        diff = rms(full, drafted)
+        if diff > max_rms:
+            failures.append(f"{target}px: RMS {diff:.2f} exceeds {max_rms}")
+        print(f"{target:>6} {full_s * 1000:>8.0f} {draft_s * 1000:>9.0f} {full_s / draft_s:>7.1f}x {diff:>6.2f}  {full.size[0]}x{full.size[1]}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
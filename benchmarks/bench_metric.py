@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""
+Smart Optimize metric benchmark: MetricEngine versus the old calculate_rms_diff.
+
+Times one quality-search trial's scoring (decode the candidate from its
+in-memory encode, then score it against the reference) for the old full-RGB
+ImageChops/ImageStat RMS and for every MetricEngine metric: scoring every
+pixel, the default band sample and the max_side downsample. The encodes being
+scored are timed alongside, since the metric should cost a small fraction of
+one, and each case's score is printed to show the sample matches every pixel.
+
+    python benchmarks/bench_metric.py [--size 1200x800] [--repeat 20]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+from PIL import Image, ImageChops, ImageStat
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+def make_reference(size):
+    """Photo-like detail: a fractal in one channel, gradients in the others"""
+    width, height = size
+    detail = Image.effect_mandelbrot((width, height), (-2.0, -1.2, 0.8, 1.2), 128)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    return Image.merge("RGB", (detail, gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+
+def calculate_rms_diff(img1, img2):
+    """The pre-MetricEngine metric, as it was"""
+    if img1.mode != img2.mode:
+        img2 = img2.convert(img1.mode)
+    if img1.size != img2.size:
+        img2 = img2.resize(img1.size, Image.NEAREST)
+    stat = ImageStat.Stat(ImageChops.difference(img1, img2))
+    return sum(stat.rms) / len(stat.rms)
+
+def best_ms(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def encode(img, fmt, **kwargs):
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **kwargs)
+    return buf.getvalue()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="1200x800", help="reference dimensions, WxH")
+    parser.add_argument("--repeat", type=int, default=20, help="timing runs per case (best is kept)")
+    args = parser.parse_args()
+    sys.path.insert(0, SRC_DIR)
+    import terminallyquick as tq
+
+    size = tuple(int(x) for x in args.size.lower().split("x"))
+    reference = make_reference(size)
+    reference.load()
+    candidate = encode(reference, "JPEG", quality=80, optimize=True)
+
+    def old_trial():
+        with Image.open(io.BytesIO(candidate)) as img:
+            return calculate_rms_diff(reference, img.convert("RGB"))
+
+    def engine_trial(engine):
+        def trial():
+            with Image.open(io.BytesIO(candidate)) as img:
+                return engine.score(img)
+        return trial
+
+    print(f"Reference {size[0]}x{size[1]}, JPEG Q80 candidate, best of {args.repeat}, NumPy: {'yes' if tq.load_numpy() else 'no'}")
+    encode_ms = {
+        "JPEG": best_ms(lambda: encode(reference, "JPEG", quality=80, optimize=True), args.repeat),
+        "WEBP method 6": best_ms(lambda: encode(reference, "WEBP", quality=80, method=6), max(1, args.repeat // 4)),
+    }
+    print(f"{'trial scoring':<32} {'ms':>7} {'vs JPEG encode':>15} {'vs WEBP encode':>15} {'score':>8}")
+    def decode_only():
+        with Image.open(io.BytesIO(candidate)) as img:
+            img.draft("L", None)
+            img.load()
+
+    # Every trial decodes its candidate: the floor under any metric
+    cases = {"candidate luma decode only": decode_only, "old RGB calculate_rms_diff": old_trial}
+    for metric in tq.METRICS:
+        cases[f"{metric}, every pixel"] = engine_trial(tq.MetricEngine(reference, metric, band_step=1))
+        cases[f"{metric} (default)"] = engine_trial(tq.MetricEngine(reference, metric))
+        cases[f"{metric}, max_side=512"] = engine_trial(tq.MetricEngine(reference, metric, 512))
+    for label, trial in cases.items():
+        ms = best_ms(trial, args.repeat)
+        score = trial()
+        print(f"{label:<32} {ms:>7.1f} {ms / encode_ms['JPEG']:>15.0%} {ms / encode_ms['WEBP method 6']:>15.0%} "
+              f"{'' if score is None else f'{score:.3f}':>8}")
+    for label, ms in encode_ms.items():
+        print(f"{'encode ' + label:<32} {ms:>7.1f}")
+
+if __name__ == "__main__":
+    main()
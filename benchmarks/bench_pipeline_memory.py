@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+"""
+Pipeline allocation benchmark for process_item().
+
+Counts Pillow image allocations and measures the peak-RSS growth of one
+process_item() call per source/output format pair. Every case runs in a fresh
+interpreter, so ru_maxrss covers that case alone. POSIX only (needs `resource`).
+
+    python benchmarks/bench_pipeline_memory.py [--size 4000x3000] [--target 1200]
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# name: (source format, source mode, EXIF orientation, output format)
+CASES = {
+    "jpeg-to-jpeg": ("JPEG", "RGB", None, "JPEG"),
+    "jpeg-rot6-to-webp": ("JPEG", "RGB", 6, "WEBP"),
+    "png-rgba-to-webp": ("PNG", "RGBA", None, "WEBP"),
+    "png-rgba-to-jpeg": ("PNG", "RGBA", None, "JPEG"),
+    "tiff-to-png": ("TIFF", "RGB", None, "PNG"),
+    "png-small-kept": ("PNG", "RGB", None, "PNG"),
+}
+
+def make_source(folder, name, size):
+    """Write a synthetic gradient image for one case and return its filename"""
+    from PIL import Image
+    fmt, mode, orientation, _ = CASES[name]
+    width, height = size
+    if name.endswith("kept"):
+        width, height = 800, 600  # smaller than the target: exercises the no-resize path
+    img = Image.linear_gradient("L").resize((width, height))
+    img = Image.merge("RGB", (img, img.transpose(Image.FLIP_LEFT_RIGHT), img.transpose(Image.FLIP_TOP_BOTTOM)))
+    if mode == "RGBA":
+        img.putalpha(Image.linear_gradient("L").resize((width, height)))
+    filename = f"{name}.{fmt.lower()}"
+    kwargs = {}
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        kwargs["exif"] = exif
+    img.save(os.path.join(folder, filename), format=fmt, **kwargs)
+    return filename
+
+def run_case(name, folder, target):
+    """Runs inside the child interpreter: process one image and report the counters"""
+    os.chdir(folder)
+    sys.path.insert(0, SRC_DIR)
+    import terminallyquick as tq
+    from PIL import Image
+
+    filename = next(f for f in os.listdir(folder) if f.startswith(name + "."))
+    settings = {"name": "Bench", "format": CASES[name][3], "size": target, "quality": 85,
+                "crop": False, "aspect": None, "anchor": None, "allow_upscale": False}
+    context = {"input_folder": folder, "output_folder": os.path.join(folder, "out", name),
+               "session_id": "bench", "settings": settings}
+    os.makedirs(context["output_folder"])
+    tq.DeltaSync.CACHE_FILE = os.path.join(context["output_folder"], ".tq_sync.db")
+    probe = tq.probe_image(os.path.join(folder, filename))
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    before = Image.core.get_stats()["new_count"]
+    result = tq.process_item(filename, context, probe)[0]
+    allocations = Image.core.get_stats()["new_count"] - before
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KB elsewhere
+    return {
+        "case": name,
+        "status": result["status"],
+        "result": result.get("final_size"),
+        "image_allocations": allocations,
+        "peak_rss_growth_mb": round((peak_rss - baseline_rss) * scale / (1024 * 1024), 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="4000x3000", help="source dimensions, WxH")
+    parser.add_argument("--target", type=int, default=1200, help="target short edge")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--folder", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.folder, args.target)))
+        return
+
+    # Sources are written here, so their creation never counts towards a case's RSS
+    size = tuple(int(x) for x in args.size.lower().split("x"))
+    folder = tempfile.mkdtemp(prefix="tq_bench_")
+    for name in CASES:
+        make_source(folder, name, size)
+
+    print(f"{'case':<20} {'allocs':>7} {'peak RSS +MB':>13}  result")
+    for name in CASES:
+        out = subprocess.run([sys.executable, __file__, "--case", name, "--folder", folder, "--target", str(args.target)],
+                             capture_output=True, text=True, check=True).stdout
+        row = json.loads(out.strip().splitlines()[-1])
+        print(f"{row['case']:<20} {row['image_allocations']:>7} {row['peak_rss_growth_mb']:>13}  {row['status']} {row['result']}")
+    shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
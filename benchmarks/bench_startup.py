@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+"""
+Startup benchmark: cost of `import terminallyquick` in a fresh interpreter.
+
+Times the import against a bare interpreter start and against Pillow alone (the
+floor every run pays), then checks the import stayed lazy: no optional
+subsystem is loaded and nothing is created in the working directory. Exits 1
+on any violation, or when the median import cost exceeds --max-ms.
+
+    python benchmarks/bench_startup.py [--runs 20] [--max-ms 100]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Loaded only when a feature needs them (watch mode, HEIC/AVIF, smart metrics, JSON import)
+LAZY_MODULES = ("watchdog", "pillow_heif", "numpy", "tkinter")
+
+CASES = {
+    "interpreter": "pass",
+    "pillow": "import PIL.Image",
+    "terminallyquick": f"import sys; sys.path.insert(0, {SRC_DIR!r}); import terminallyquick",
+}
+
+def time_case(code, runs, cwd):
+    """Wall time (ms) of a fresh interpreter running `code`, one sample per run"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=cwd, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def loaded_lazy_modules(cwd):
+    code = CASES["terminallyquick"] + f"; print(__import__('json').dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="interpreter launches per case")
+    parser.add_argument("--max-ms", type=float, default=100.0, help="fail above this median import cost (over a bare interpreter)")
+    args = parser.parse_args()
+
+    cwd = tempfile.mkdtemp(prefix="tq_startup_")
+    try:
+        # Warm the bytecode cache and the OS page cache before timing
+        time_case(CASES["terminallyquick"], 2, cwd)
+        medians = {name: statistics.median(time_case(code, args.runs, cwd)) for name, code in CASES.items()}
+        loaded = loaded_lazy_modules(cwd)
+        created = os.listdir(cwd)
+    finally:
+        shutil.rmtree(cwd, ignore_errors=True)
+
+    import_cost = medians["terminallyquick"] - medians["interpreter"]
+    print(f"Median of {args.runs} launches")
+    for name, median in medians.items():
+        print(f"  {name:<16} {median:>7.1f} ms")
+    print(f"  {'import cost':<16} {import_cost:>7.1f} ms (Pillow alone: {medians['pillow'] - medians['interpreter']:.1f} ms)")
+
+    failures = []
+    if loaded:
+        failures.append(f"optional modules loaded at import: {', '.join(loaded)}")
+    if created:
+        failures.append(f"import created files in the working directory: {', '.join(created)}")
+    if import_cost > args.max_ms:
+        failures.append(f"import cost {import_cost:.1f} ms exceeds {args.max_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+
+"""
+Throughput benchmark: process_images() over a deterministic synthetic corpus.
+
+The corpus mixes JPEG, PNG with alpha, TIFF and WEBP sources in portrait and
+landscape at several sizes, and is generated identically from a seed (its
+digest is recorded, so runs are only compared on the same corpus). Every
+configuration runs non-interactively in a fresh interpreter with an empty
+DeltaSync cache and app config, and reports images/sec, MB/s (input), p50/p95
+per-image latency, peak RSS and the worker count (for autotuned runs, the
+level the tuner settled on). Results are written as JSON; --compare prints the
+change against an earlier results file, e.g. from another commit.
+--matrix engines runs the thread and process engines side by side at 1, 2,
+4, ... workers up to the core count and prints the speedup of processes over
+threads (use --sources jpg,png for a mixed JPEG/PNG batch).
+
+    python benchmarks/bench_throughput.py [--matrix quick|full|engines] [--count 48]
+        [--sources jpg,png,tif,webp] [--corpus DIR] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Source formats: (format, mode, extension)
+SOURCES = (("JPEG", "RGB", "jpg"), ("PNG", "RGBA", "png"), ("TIFF", "RGB", "tif"), ("WEBP", "RGB", "webp"))
+SIZES = ((640, 480), (1600, 1200), (3000, 2000), (4000, 3000))
+
+BASELINE = {"format": "WEBP", "size": 1200, "crop": False, "smart_optimize": False, "engine": "thread", "workers": None}
+# quick: one axis at a time from the baseline; full: every combination
+AXES = {
+    "format": ("WEBP", "JPEG", "PNG"),
+    "size": (1200, 600, 2000),
+    "crop": (False, True),
+    "smart_optimize": (False, True),
+    "engine": ("thread", "process"),
+    "workers": (None, 1, 2, 4, "autotune"), # None: the default count
+}
+
+def make_corpus(folder, count, seed, sources=SOURCES):
+    """Write `count` deterministic images; the same seed always gives the same files"""
+    from PIL import Image
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    for i in range(count):
+        fmt, mode, ext = sources[i % len(sources)]
+        width, height = rng.choice(SIZES)
+        if rng.random() < 0.4:
+            width, height = height, width # portrait
+        # Fractal detail in one channel, gradients in the others: compresses like a photo, not like flat colour
+        x0 = rng.uniform(-2.2, -0.6)
+        detail = Image.effect_mandelbrot((width, height), (x0, -1.1, x0 + 1.6, 1.1), 96)
+        gradient = Image.linear_gradient("L").resize((width, height))
+        img = Image.merge("RGB", (detail, gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+        if mode == "RGBA":
+            img.putalpha(Image.radial_gradient("L").resize((width, height)))
+        kwargs = {"quality": 90} if fmt in ("JPEG", "WEBP") else {}
+        img.save(os.path.join(folder, f"bench_{i:04d}.{ext}"), format=fmt, **kwargs)
+
+def corpus_info(folder):
+    digest = hashlib.sha256()
+    total = 0
+    files = sorted(os.listdir(folder))
+    for name in files:
+        with open(os.path.join(folder, name), "rb") as f:
+            data = f.read()
+        digest.update(name.encode() + data)
+        total += len(data)
+    return {"count": len(files), "mb": round(total / (1024 * 1024), 1), "digest": digest.hexdigest()[:16]}
+
+def worker_steps(cpu_count):
+    """1, 2, 4, ... up to and including the core count"""
+    steps = [1]
+    while steps[-1] * 2 < cpu_count:
+        steps.append(steps[-1] * 2)
+    return steps + [cpu_count] if cpu_count > 1 else steps
+
+def configurations(matrix):
+    if matrix == "engines":
+        return [dict(BASELINE, format="JPEG", engine=engine, workers=workers)
+                for workers in worker_steps(os.cpu_count() or 1) for engine in ("thread", "process")]
+    if matrix == "full":
+        return [dict(zip(AXES, values)) for values in itertools.product(*AXES.values())]
+    configs = [dict(BASELINE)]
+    for axis, values in AXES.items():
+        configs += [dict(BASELINE, **{axis: value}) for value in values if value != BASELINE[axis]]
+    return configs
+
+def config_name(config):
+    workers = config["workers"] or "default"
+    return (f"{config['format']}-{config['size']}{'-crop' if config['crop'] else ''}"
+            f"{'-smart' if config['smart_optimize'] else ''}-{config['engine']}x{workers}")
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+def run_config(config, corpus):
+    """Runs inside the child interpreter: one process_images() call, measured"""
+    work = tempfile.mkdtemp(prefix="tq_bench_run_")
+    os.chdir(work) # DeltaSync cache and relative paths stay in this run's folder
+    sys.path.insert(0, SRC_DIR)
+    import terminallyquick as tq
+
+    settings = {"name": "Bench", "format": config["format"], "size": config["size"], "quality": 85,
+                "crop": config["crop"], "aspect": (1, 1) if config["crop"] else None,
+                "anchor": "center" if config["crop"] else None, "allow_upscale": False,
+                "smart_optimize": config["smart_optimize"], "engine": config["engine"]}
+    if config["workers"] == "autotune":
+        settings["autotune"] = True
+    elif config["workers"]:
+        settings["workers"] = config["workers"]
+    files = sorted(tq.iter_images(corpus))
+    output = os.path.join(work, "out")
+
+    start = time.perf_counter()
+    tq.process_images(corpus, files, settings, "Benchmark", custom_output_folder=output, interactive=False)
+    seconds = time.perf_counter() - start
+
+    with open(os.path.join(output, "processing_settings.json")) as f:
+        log = json.load(f)
+    latencies = {}
+    with open(os.path.join(output, tq.IMAGE_LOG_FILE)) as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("seconds") is not None:
+                latencies[record["file"]] = record["seconds"]
+    input_mb = sum(os.path.getsize(os.path.join(corpus, name)) for name in files) / (1024 * 1024)
+    shutil.rmtree(work, ignore_errors=True)
+    autotune = log["session"].get("autotune")
+    return {
+        "images": log["processing"]["stats"]["total_processed"],
+        "skipped": log["processing"]["stats"]["total_skipped"],
+        "workers": autotune["chosen"] if autotune else log["session"]["max_workers"],
+        "seconds": round(seconds, 3),
+        "images_per_sec": round(len(files) / seconds, 2),
+        "mb_per_sec": round(input_mb / seconds, 2),
+        "latency_p50_ms": round(percentile(latencies.values(), 50) * 1000, 1) if latencies else None,
+        "latency_p95_ms": round(percentile(latencies.values(), 95) * 1000, 1) if latencies else None,
+        "output_kb": log["session"]["total_output_kb"],
+        "peak_rss_mb": tq.get_peak_rss_mb(),
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if baseline["meta"]["corpus"]["digest"] != results["meta"]["corpus"]["digest"]:
+        print("WARNING: the baseline was measured on a different corpus")
+    before = {row["name"]: row for row in baseline["results"]}
+    print(f"\nChange vs {baseline_path} (commit {baseline['meta'].get('commit')})")
+    print(f"{'configuration':<34} {'img/s':>8} {'p95':>8} {'RSS':>8}")
+    for row in results["results"]:
+        old = before.get(row["name"])
+        if not old:
+            continue
+        def change(key):
+            if not old.get(key) or row.get(key) is None:
+                return "n/a"
+            return f"{(row[key] / old[key] - 1) * 100:+.0f}%"
+        print(f"{row['name']:<34} {change('images_per_sec'):>8} {change('latency_p95_ms'):>8} {change('peak_rss_mb'):>8}")
+
+def print_engine_speedup(results):
+    rows = {(row["config"]["engine"], row["config"]["workers"]): row["images_per_sec"] for row in results["results"]}
+    print(f"\nProcess vs thread engine ({results['meta']['cpu_count']} CPUs, {results['meta']['corpus']['count']} images)")
+    print(f"{'workers':>7} {'thread img/s':>13} {'process img/s':>14} {'speedup':>8}")
+    for workers in sorted({w for _, w in rows}):
+        thread, process = rows[("thread", workers)], rows[("process", workers)]
+        print(f"{workers:>7} {thread:>13} {process:>14} {process / thread:>7.2f}x")
+    best_thread = max(v for (engine, _), v in rows.items() if engine == "thread")
+    best_process = max(v for (engine, _), v in rows.items() if engine == "process")
+    print(f"{'best':>7} {best_thread:>13} {best_process:>14} {best_process / best_thread:>7.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--matrix", choices=("quick", "full", "engines"), default="quick", help="configurations to run")
+    parser.add_argument("--count", type=int, default=48, help="corpus size")
+    parser.add_argument("--sources", default=",".join(ext for _, _, ext in SOURCES), help="source formats in the corpus")
+    parser.add_argument("--seed", type=int, default=1, help="corpus seed")
+    parser.add_argument("--corpus", help="corpus folder to reuse (generated there if empty)")
+    parser.add_argument("--output", help="write the JSON results here (default: stdout)")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.config:
+        print(json.dumps(run_config(json.loads(args.config), args.corpus)))
+        return
+
+    sources = tuple(source for source in SOURCES if source[2] in args.sources.split(","))
+    if not sources:
+        parser.error(f"--sources: pick from {', '.join(ext for _, _, ext in SOURCES)}")
+    suffix = "" if sources == SOURCES else "_" + "_".join(ext for _, _, ext in sources)
+    corpus = args.corpus or os.path.join(tempfile.gettempdir(), f"tq_bench_corpus_{args.seed}_{args.count}{suffix}")
+    if not os.path.isdir(corpus) or not os.listdir(corpus):
+        print(f"Generating {args.count} images in {corpus}...", file=sys.stderr)
+        make_corpus(corpus, args.count, args.seed, sources)
+
+    import PIL
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "corpus": dict(corpus_info(corpus), seed=args.seed),
+        },
+        "results": [],
+    }
+    for config in configurations(args.matrix):
+        name = config_name(config)
+        print(f"  {name} ...", file=sys.stderr, end=" ", flush=True)
+        out = subprocess.run([sys.executable, __file__, "--config", json.dumps(config), "--corpus", corpus],
+                             capture_output=True, text=True, check=True).stdout
+        row = dict(name=name, config=config, **json.loads(out.strip().splitlines()[-1]))
+        results["results"].append(row)
+        print(f"{row['images_per_sec']} img/s, p95 {row['latency_p95_ms']} ms, RSS {row['peak_rss_mb']} MB", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    if args.compare:
+        print_comparison(results, args.compare)
+    if args.matrix == "engines":
+        print_engine_speedup(results)
+
+if __name__ == "__main__":
+    main()
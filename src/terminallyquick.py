@@ -12,11 +12,9 @@ import os
 from PIL import Image, ExifTags, ImageChops, ImageStat
 import math
 
-# Define project directories and config
+# Define project directories and config (created when first written, never at import)
 PROFILES_DIR = 'profiles'
 CONFIG_FILE = '.tq_config'
-if not os.path.exists(PROFILES_DIR):
-    os.makedirs(PROFILES_DIR, exist_ok=True)
 from datetime import datetime
 import time
 from colorama import init, Fore, Style
@@ -27,24 +25,89 @@ import json
 import concurrent.futures
 import threading
 import hashlib
+import sqlite3
+import io
+import itertools
+import base64
+import contextlib
+import struct
+import heapq
+import queue
+import collections
+import importlib.util
+
+# === Optional Subsystems ===
+# Loaded on first use so that importing this module stays fast and side-effect
+# free: each HAS_* flag is None until its loader has run.
+
+# Functionality for Watchdog (imported on entering watch mode)
+HAS_WATCHDOG = None
+Observer = None
+
+def load_watchdog():
+    """Import watchdog's Observer. Returns True if available."""
+    global HAS_WATCHDOG, Observer
+    if HAS_WATCHDOG is None:
+        try:
+            from watchdog.observers import Observer
+            HAS_WATCHDOG = True
+        except ImportError:
+            HAS_WATCHDOG = False
+    return HAS_WATCHDOG
+
+def is_installed(module):
+    """Whether an optional module can be imported, without importing it"""
+    return importlib.util.find_spec(module) is not None
+
+# functionality for HEIC support (registered on the first .heic/.avif, in every worker process)
+HEIF_EXTS = ('.heic', '.avif')
+HAS_HEIF = None
+
+def load_heif_opener():
+    global HAS_HEIF
+    if HAS_HEIF is None:
+        try:
+            from pillow_heif import register_heif_opener
+            register_heif_opener()
+            HAS_HEIF = True
+        except ImportError:
+            HAS_HEIF = False  # gracefully handle if not installed (though it should be)
+    return HAS_HEIF
+
+def ensure_opener(path):
+    """Register the Pillow plugin a file needs before it is opened"""
+    if path.lower().endswith(HEIF_EXTS):
+        load_heif_opener()
+
+# NumPy accelerates the smart quality metrics (and is required for SSIM)
+HAS_NUMPY = None
+np = None
+
+def load_numpy():
+    global HAS_NUMPY, np
+    if HAS_NUMPY is None:
+        try:
+            import numpy as np
+            HAS_NUMPY = True
+        except ImportError:
+            HAS_NUMPY = False
+    return HAS_NUMPY
 
-# Functionality for Watchdog
+# resource reports peak RSS for the memory budget log (POSIX only)
 try:
-    from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler
-    HAS_WATCHDOG = True
+    import resource
+    HAS_RESOURCE = True
 except ImportError:
-    HAS_WATCHDOG = False
+    HAS_RESOURCE = False
 
-# functionality for HEIC support
-try:
-    from pillow_heif import register_heif_opener
-    register_heif_opener()
-except ImportError:
-    pass  # gracefully handle if not installed (though it should be)
+# Check for exiftool (fallback for CR3 files the built-in parser cannot read), on the first CR3
+HAS_EXIFTOOL = None
 
-# Check for exiftool (required for CR3 support)
-HAS_EXIFTOOL = shutil.which("exiftool") is not None
+def has_exiftool():
+    global HAS_EXIFTOOL
+    if HAS_EXIFTOOL is None:
+        HAS_EXIFTOOL = shutil.which("exiftool") is not None
+    return HAS_EXIFTOOL
 
 init(autoreset=True)
 
@@ -93,10 +156,16 @@ def view_most_recent_log():
     runs.sort(key=lambda x: os.path.getmtime(os.path.join('resized_images', x)), reverse=True)
     latest_run = runs[0]
     
-    # Try to find the summary text file first
+    # Try to find the summary text file first (multi-profile runs keep one per profile subfolder)
     run_path = os.path.join('resized_images', latest_run)
     try:
         summary_files = [f for f in os.listdir(run_path) if f.endswith("_summary.txt")]
+        if not summary_files:
+            for d in sorted(os.listdir(run_path)):
+                profile_path = os.path.join(run_path, d)
+                if os.path.isdir(profile_path) and os.path.exists(os.path.join(profile_path, "processing_settings_summary.txt")):
+                    run_path, summary_files = profile_path, ["processing_settings_summary.txt"]
+                    break
         
         if summary_files:
             log_path = os.path.join(run_path, summary_files[0])
@@ -138,6 +207,7 @@ def show_help_screen():
     print("  • Manual Config - Full control over every setting")
     print("  • Smart Mode    - Auto-suggestion based on analysis")
     print("  • Fast Track    - Use your saved profiles for one-click processing")
+    print("  • Multi-Profile - Run several profiles in one pass (each image decoded once)")
     print("  • Import        - Load settings from a JSON file")
     
     print(f"\n{Fore.MAGENTA}PRO TIPS:{Style.RESET_ALL}")
@@ -173,11 +243,13 @@ def import_settings_from_json():
             data = json.load(f)
         
         # Determine if it's a full log or a profile
+        if "settings" not in data and "settings" in data.get("session", {}):
+            data = data["session"]
         if "settings" in data:
             settings = data["settings"]
             name = data.get("profile_name", settings.get("name", "Imported"))
             print(f"{Fore.GREEN}[OK] Imported settings: {name}")
-            return settings
+            return validate_resize_strategy(settings, f"Imported '{name}'")
         else:
             print(f"{Fore.RED}[!] Invalid settings format in JSON.")
     except Exception as e:
@@ -188,23 +260,170 @@ def import_settings_from_json():
 def get_file_size_kb(path):
     return os.path.getsize(path) // 1024
 
+# === Stage Timing ===
+# Opt-in per profile ("stage_timing": true). Stages in pipeline order; cropping that
+# is folded into the resample counts as resize, "crop" only covers plain same-scale crops.
+STAGES = ("probe", "hash", "restore", "decode", "alpha", "crop", "resize", "orientation", "smart", "encode", "store")
+
+class StageTimer:
+    """Monotonic wall time per pipeline stage for one item. Each lap() charges the
+    time since the previous lap to a stage, so the stages add up to the item total."""
+    def __init__(self):
+        self.stages = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self.last
+        self.last = now
+
+    def read(self, size):
+        self.bytes_read += size
+
+    def wrote(self, path):
+        self.bytes_written += os.path.getsize(path)
+
+    def record(self):
+        """Fields merged into the item's results (stage times in ms)"""
+        return {"stages": {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+                "bytes_read": self.bytes_read, "bytes_written": self.bytes_written}
+
+class NullStageTimer:
+    """Stand-in while stage timing is off: every call is a no-op"""
+    def lap(self, stage): pass
+    def read(self, size): pass
+    def wrote(self, path): pass
+    def record(self): return {}
+
+NO_TIMER = NullStageTimer()
+
+class StageTimingStats:
+    """Running per-stage totals and percentiles for a run. Samples go into
+    log-spaced buckets (each 10% wider than the last), so memory stays constant
+    however long the run and percentiles are exact to within a bucket."""
+    BUCKET_BASE_MS = 0.01
+    BUCKET_GROWTH = 1.1
+
+    def __init__(self):
+        self.images = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.totals = {}     # stage -> total ms
+        self.histograms = {} # stage -> {bucket: count}
+
+    def add(self, res):
+        self.images += 1
+        self.bytes_read += res["bytes_read"]
+        self.bytes_written += res["bytes_written"]
+        for stage, ms in res["stages"].items():
+            self.totals[stage] = self.totals.get(stage, 0.0) + ms
+            bucket = 0 if ms <= self.BUCKET_BASE_MS else math.ceil(math.log(ms / self.BUCKET_BASE_MS, self.BUCKET_GROWTH))
+            histogram = self.histograms.setdefault(stage, {})
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    def percentile(self, stage, pct):
+        """Upper bound (ms) of the bucket holding the pct-th percentile sample"""
+        histogram = self.histograms[stage]
+        rank = max(1, math.ceil(pct / 100 * sum(histogram.values())))
+        for bucket in sorted(histogram):
+            rank -= histogram[bucket]
+            if rank <= 0:
+                return round(self.BUCKET_BASE_MS * self.BUCKET_GROWTH ** bucket, 3)
+
+    def summary(self):
+        total_ms = sum(self.totals.values()) or 1
+        stages = {}
+        for stage in sorted(self.totals, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+            stages[stage] = {
+                "images": sum(self.histograms[stage].values()),
+                "total_s": round(self.totals[stage] / 1000, 3),
+                "share": round(self.totals[stage] / total_ms, 3),
+                "p50_ms": self.percentile(stage, 50),
+                "p95_ms": self.percentile(stage, 95),
+            }
+        return {"images": self.images, "bytes_read": self.bytes_read, "bytes_written": self.bytes_written, "stages": stages}
+
+IMAGE_LOG_FILE = "processing_images.jsonl"
+
+class ImageLogWriter:
+    """Append-only JSONL log of per-image records, written by a dedicated thread.
+    Records are handed over as results complete, so the processing loop never
+    waits on the disk, memory stays constant and a crash loses almost nothing.
+    If writing fails (e.g. a full disk) the error is reported once and later
+    records are dropped, as are records arriving while MAX_PENDING are still
+    queued (counted and reported on close); processing never blocks on the log."""
+    MAX_PENDING = 4096 # records queued before write() drops them (only if the disk falls behind)
+
+    def __init__(self, path):
+        self.path = path
+        self.records = queue.Queue(maxsize=self.MAX_PENDING)
+        self.failed = None # the error that stopped writing (e.g. disk full)
+        self.dropped = 0 # records lost to a full queue
+        self.thread = threading.Thread(target=self._run, name="tq-image-log", daemon=True)
+        self.thread.start()
+
+    def write(self, record):
+        if self.failed is None:
+            try:
+                self.records.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+
+    def _run(self):
+        batch = []
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                while True:
+                    # Everything queued so far goes out in one write and one flush
+                    batch = [self.records.get()]
+                    while True:
+                        try:
+                            batch.append(self.records.get_nowait())
+                        except queue.Empty:
+                            break
+                    f.write("".join(json.dumps(record) + "\n" for record in batch if record is not None))
+                    f.flush()
+                    if batch[-1] is None:
+                        return
+        except Exception as e:
+            self.failed = e
+            print(f"\n{Fore.RED}[!] Per-image log stopped ({self.path}): {e}{Style.RESET_ALL}")
+            if batch and batch[-1] is None:
+                return
+            # Keep consuming so a blocked write() or close() never waits on a dead writer
+            while self.records.get() is not None:
+                pass
+
+    def close(self):
+        """Write out everything still queued and stop the writer"""
+        self.records.put(None)
+        self.thread.join()
+        if self.dropped:
+            print(f"{Fore.YELLOW}[!] Per-image log fell behind: {self.dropped} records dropped ({self.path}){Style.RESET_ALL}")
+
 def setup_logging(output_folder, settings, version_mode):
-    """Setup detailed logging for the session"""
+    """Setup detailed logging for the session. Per-image records stream to a
+    JSONL file; the JSON log keeps the session details and running aggregates.
+    Returns (log_data, settings_path, image_log)."""
     log_data = {
         "session": {
             "timestamp": datetime.now().isoformat(),
             "version_mode": version_mode,
             "settings": settings,
-            "output_folder": output_folder
+            "output_folder": output_folder,
+            "images_log": IMAGE_LOG_FILE
         },
         "processing": {
-            "images": {},
             "stats": {
                 "total_processed": 0,
                 "total_skipped": 0,
                 "upscaled_count": 0,
                 "downscaled_count": 0,
-                "kept_original_size": 0
+                "kept_original_size": 0,
+                "restored": {},
+                "variants": {}
             }
         }
     }
@@ -214,42 +433,56 @@ def setup_logging(output_folder, settings, version_mode):
     with open(settings_path, 'w') as f:
         json.dump(log_data, f, indent=2)
     
-    return log_data, settings_path
+    return log_data, settings_path, ImageLogWriter(os.path.join(output_folder, IMAGE_LOG_FILE))
 
-def log_image_processing(log_data, filename, original_size, final_size, action, file_size_kb, variant_name=""):
-    """Log detailed information about each image processed"""
-    image_log = {
-        "filename": filename,
-        "variant": variant_name,
-        "original_size": original_size,
-        "final_size": final_size,
-        "action": action,
-        "file_size_kb": file_size_kb,
-        "timestamp": datetime.now().isoformat()
-    }
-    
-    log_data["processing"]["images"].append(image_log)
-    
-    # Update stats
-    stats = log_data["processing"]["stats"]
-    if action == "upscaled":
-        stats["upscaled_count"] += 1
-    elif action == "downscaled":
-        stats["downscaled_count"] += 1
-    elif action == "kept_original":
-        stats["kept_original_size"] += 1
-    
+def record_result(run, res):
+    """Stream one successful item result to the run's image log (one record per
+    emitted variant) and fold it into the running stats"""
+    stats = run["log_data"]["processing"]["stats"]
+    run["processed"] += 1
+    run["output_kb"] += res["new_size_kb"]
     stats["total_processed"] += 1
-
-def save_final_log(log_data, settings_path, processing_time, total_input_mb, total_output_size):
-    """Save final processing log with complete stats"""
+    timestamp = datetime.now().isoformat()
+    for output in res["variants"]:
+        variant_name = output["variant"] or "default"
+        record = dict(output["log_entry"], variant=variant_name, seconds=res.get("seconds"), timestamp=timestamp)
+        if "stages" in res:
+            record.update(stages=res["stages"], bytes_read=res["bytes_read"], bytes_written=res["bytes_written"])
+        run["image_log"].write(record)
+        variant = stats["variants"].setdefault(variant_name, {"images": 0, "output_kb": 0})
+        variant["images"] += 1
+        variant["output_kb"] += output["size_kb"]
+    if "stages" in res:
+        if "stage_timing" not in run:
+            run["stage_timing"] = StageTimingStats()
+        run["stage_timing"].add(res)
+
+    if res.get("restored_with"):
+        stats["restored"][res["restored_with"]] = stats["restored"].get(res["restored_with"], 0) + 1
+    action = res["action"]
+    if action == "upscaled": stats["upscaled_count"] += 1
+    elif action == "downscaled": stats["downscaled_count"] += 1
+    else: stats["kept_original_size"] += 1
+
+def record_skip(run, filename, reason):
+    """Log an item a run produced nothing for"""
+    run["log_data"]["processing"]["stats"]["total_skipped"] += 1
+    run["image_log"].write({"file": filename, "status": "skipped", "reason": reason, "timestamp": datetime.now().isoformat()})
+
+def save_final_log(log_data, settings_path, processing_time, total_input_mb, total_output_size, stage_timing=None):
+    """Write the JSON log and a readable summary from the running aggregates.
+    Cheap enough to call repeatedly (Watchdog Mode flushes on an interval)."""
+    if stage_timing:
+        log_data["processing"]["stage_timing"] = stage_timing.summary()
     log_data["session"]["processing_time_seconds"] = processing_time
     log_data["session"]["total_input_mb"] = total_input_mb
     log_data["session"]["total_output_kb"] = total_output_size
     log_data["session"]["compression_ratio"] = (total_input_mb * 1024 / total_output_size) if total_output_size > 0 else 0
     
-    with open(settings_path, 'w') as f:
+    # Replace atomically: a crash mid-write never leaves a truncated log
+    with open(settings_path + ".tmp", 'w') as f:
         json.dump(log_data, f, indent=2)
+    os.replace(settings_path + ".tmp", settings_path)
     
     # Also create a readable summary
     summary_path = settings_path.replace('.json', '_summary.txt')
@@ -263,22 +496,36 @@ def save_final_log(log_data, settings_path, processing_time, total_input_mb, tot
         f.write(f"Target Size: {log_data['session']['settings']['size']}px\n")
         f.write(f"Quality: {log_data['session']['settings']['quality']}%\n")
         f.write(f"Upscaling: {'Enabled' if log_data['session']['settings'].get('allow_upscale') else 'Disabled'}\n")
-        f.write(f"Processing Time: {processing_time}s\n\n")
+        f.write(f"Processing Time: {processing_time}s\n")
+        autotune = log_data['session'].get('autotune')
+        if autotune:
+            f.write(f"Workers: autotuned to {autotune['chosen']} (started at {autotune['start']}, bounds {autotune['bounds'][0]}-{autotune['bounds'][1]}, {len(autotune['windows'])} windows)\n")
+        memory = log_data['session'].get('memory')
+        if memory:
+            f.write(f"Peak Memory: {memory['peak_estimated_mb']} MB estimated in flight (budget {memory['budget_mb']} MB), peak RSS {memory['peak_rss_mb']} MB\n")
+        f.write("\n")
         
         stats = log_data['processing']['stats']
         f.write(f"Processing Stats:\n")
         f.write(f"  Total Processed: {stats['total_processed']}\n")
         f.write(f"  Upscaled: {stats['upscaled_count']}\n")
         f.write(f"  Downscaled: {stats['downscaled_count']}\n")
-        f.write(f"  Kept Original: {stats['kept_original_size']}\n\n")
+        f.write(f"  Kept Original: {stats['kept_original_size']}\n")
+        f.write(f"  Skipped: {stats['total_skipped']}\n")
+        if stats.get('restored'):
+            f.write(f"  Delta Sync Restores: {', '.join(f'{k} {v}' for k, v in stats['restored'].items())}\n")
+        f.write("\n")
         
-        f.write(f"Individual Image Details:\n")
-        for variant, imgs in log_data['processing']['images'].items():
-            if variant != "default":
-                f.write(f"\nVariant: {variant}\n")
-            for img in imgs:
-                f.write(f"  {img['file']}:\n")
-                f.write(f"    {img['original']} → {img['result']} | {img['action']} | {img['size_kb']} KB\n")
+        f.write(f"Output Variants:\n")
+        for variant, totals in stats['variants'].items():
+            f.write(f"  {variant}: {totals['images']} images | {totals['output_kb']} KB\n")
+        timing = log_data['processing'].get('stage_timing')
+        if timing:
+            f.write(f"\nStage Timing ({timing['images']} images | {round(timing['bytes_read'] / (1024 * 1024), 1)} MB read | "
+                    f"{round(timing['bytes_written'] / (1024 * 1024), 1)} MB written):\n")
+            for stage, totals in timing['stages'].items():
+                f.write(f"  {stage:<12} {totals['total_s']:>9.2f}s {totals['share']:>6.1%} | p50 {totals['p50_ms']:.2f} ms | p95 {totals['p95_ms']:.2f} ms\n")
+        f.write(f"\nPer-image details: {log_data['session']['images_log']} (one JSON record per line)\n")
 
 def get_resize_action_and_emoji(original_short_edge, target_size, allow_upscale):
     """Determine what action will be taken and appropriate emoji/description"""
@@ -289,13 +536,15 @@ def get_resize_action_and_emoji(original_short_edge, target_size, allow_upscale)
     else:
         return "kept_original", "(=)", "Kept original size"
 
-def generate_web_friendly_filename(original_name, settings, timestamp):
+def generate_web_friendly_filename(original_name, settings, timestamp, variant=None):
     """Generate SEO-friendly filenames"""
     base = os.path.splitext(original_name)[0]
     clean_base = "".join(c.lower() if c.isalnum() else "_" for c in base)
     clean_base = clean_base.strip("_")
     
-    if settings.get('responsive'):
+    if variant and variant.get('width'):
+        size_suffix = f"{variant['width']}w"
+    elif settings.get('responsive'):
         size_suffix = f"{settings['size']}w"
     else:
         size_suffix = f"{settings['size']}w" if not settings.get('crop') else f"{settings['size']}x{settings['size']}"
@@ -320,59 +569,342 @@ def print_current_selections(format=None, size=None, quality=None, aspect=None,
     else:
         print(Fore.CYAN + "[No selections made yet.]\n")
 
-def convert_cr3_to_jpeg(cr3_path, input_folder):
-    import subprocess
-    temp_cr3_folder = os.path.join(input_folder, "temp_cr3")
-    os.makedirs(temp_cr3_folder, exist_ok=True)
-    base = os.path.splitext(os.path.basename(cr3_path))[0]
-    temp_path = os.path.join(temp_cr3_folder, f"{base}_preview.jpg")
-    
-    # Securely extract preview using subprocess instead of shell redirection
+# === CR3 Container ===
+# A CR3 is an ISOBMFF file: the first track holds the full-size JPEG, a top-level
+# uuid box the 1620x1080 PRVW preview, and CMT1 (inside Canon's moov uuid box) is a
+# TIFF IFD0 carrying the orientation. Only box headers are read, never the raw data.
+CR3_CANON_UUID = bytes.fromhex("85c0b687820f11e08111f4ce462b6a48")
+CR3_PREVIEW_UUID = bytes.fromhex("eaf42b5e1c984b88b9fbb7dc406e4d16")
+
+def iter_boxes(f, start, end):
+    """Yield (type, uuid, payload_start, box_end) for the ISOBMFF boxes in [start, end)"""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        size, box_type = struct.unpack(">I4s", f.read(8))
+        payload = pos + 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            payload += 8
+        elif size == 0:
+            size = end - pos
+        if size < payload - pos or pos + size > end:
+            raise ValueError("Malformed ISOBMFF box")
+        uuid = None
+        if box_type == b'uuid':
+            uuid = f.read(16)
+            payload += 16
+        yield box_type.decode('latin-1'), uuid, payload, pos + size
+        pos += size
+
+def find_box(f, start, end, *path, uuid=None):
+    """(payload_start, box_end) of the first box along `path`, or None.
+    `uuid` selects among uuid boxes at the last level."""
+    for depth, name in enumerate(path):
+        last = depth == len(path) - 1
+        for box_type, box_uuid, payload, box_end in iter_boxes(f, start, end):
+            if box_type == name and (not last or uuid is None or box_uuid == uuid):
+                start, end = payload, box_end
+                break
+        else:
+            return None
+    return start, end
+
+def read_tiff_orientation(data):
+    """Orientation (tag 0x0112) from IFD0 of a TIFF structure, or None"""
+    order = {b'II': '<', b'MM': '>'}.get(data[:2])
+    if order is None:
+        return None
+    ifd = struct.unpack(order + "I", data[4:8])[0]
+    count = struct.unpack(order + "H", data[ifd:ifd + 2])[0]
+    for n in range(count):
+        entry = ifd + 2 + n * 12
+        tag, _, _, value = struct.unpack(order + "HHI2s", data[entry:entry + 10])
+        if tag == 0x0112:
+            return struct.unpack(order + "H", value)[0]
+    return None
+
+def parse_cr3(f):
+    """Locate the embedded JPEGs and the orientation of an open CR3 file.
+    Returns {"jpeg": (offset, length, width, height) | None, "preview": (offset, length) | None,
+    "orientation": int | None}. Raises ValueError when `f` is not a CR3."""
+    f.seek(0, 2)
+    file_end = f.tell()
+    ftyp = find_box(f, 0, file_end, 'ftyp')
+    f.seek(ftyp[0] if ftyp else 0)
+    if not ftyp or f.read(4) != b'crx ':
+        raise ValueError("Not a CR3 file")
+    moov = find_box(f, 0, file_end, 'moov')
+    if moov is None:
+        raise ValueError("CR3 has no moov box")
+    info = {"jpeg": None, "preview": None, "orientation": None}
+
+    canon = find_box(f, *moov, 'uuid', uuid=CR3_CANON_UUID)
+    cmt1 = canon and find_box(f, *canon, 'CMT1')
+    if cmt1:
+        f.seek(cmt1[0])
+        info["orientation"] = read_tiff_orientation(f.read(cmt1[1] - cmt1[0]))
+
+    # Track 1: a single JPEG sample (stsd entry geometry, stsz length, co64/stco offset)
+    stbl = find_box(f, *moov, 'trak', 'mdia', 'minf', 'stbl')
+    if stbl:
+        stsd, stsz = find_box(f, *stbl, 'stsd'), find_box(f, *stbl, 'stsz')
+        co64, stco = find_box(f, *stbl, 'co64'), find_box(f, *stbl, 'stco')
+        if stsd and stsz and (co64 or stco):
+            f.seek(stsd[0] + 8 + 8 + 24)  # full box header, entry header, visual sample entry fields
+            width, height = struct.unpack(">HH", f.read(4))
+            f.seek(stsz[0] + 4)
+            length, count = struct.unpack(">II", f.read(8))
+            if length == 0 and count:
+                length = struct.unpack(">I", f.read(4))[0]
+            f.seek((co64 or stco)[0] + 8)
+            offset = struct.unpack(">Q", f.read(8))[0] if co64 else struct.unpack(">I", f.read(4))[0]
+            if length and offset + length <= file_end:
+                info["jpeg"] = (offset, length, width, height)
+
+    # PRVW: 8 bytes into its uuid box; the JPEG length sits 12 bytes into PRVW
+    preview_box = find_box(f, 0, file_end, 'uuid', uuid=CR3_PREVIEW_UUID)
+    prvw = preview_box and find_box(f, preview_box[0] + 8, preview_box[1], 'PRVW')
+    if prvw:
+        f.seek(prvw[0] + 12)
+        length = struct.unpack(">I", f.read(4))[0]
+        if prvw[0] + 16 + length <= prvw[1]:
+            info["preview"] = (prvw[0] + 16, length)
+    return info
+
+def read_cr3_embedded(cr3_path):
+    """Full-size JPEG (else the PRVW preview) bytes and orientation of a CR3, without exiftool"""
+    with open(cr3_path, 'rb') as f:
+        info = parse_cr3(f)
+        for region in (info["jpeg"], info["preview"]):
+            if region:
+                f.seek(region[0])
+                data = f.read(region[1])
+                if data[:2] == b'\xff\xd8':
+                    return data, info["orientation"]
+    raise ValueError("CR3 has no embedded JPEG")
+
+# === ExifTool Sessions ===
+class ExifToolSession:
+    """One `exiftool -stay_open True -@ -` process: Perl starts once, then each
+    request is a few argument lines on stdin answered up to a {readyN} marker."""
+
+    def __init__(self):
+        import subprocess
+        self.proc = subprocess.Popen(
+            ['exiftool', '-stay_open', 'True', '-@', '-'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self.counter = 0
+
+    def execute(self, *args):
+        """Run one command and return its raw stdout"""
+        self.counter += 1
+        marker = f"{{ready{self.counter}}}".encode()
+        lines = ('-charset', 'filename=utf8') + args + (f"-execute{self.counter}",)
+        self.proc.stdin.write(("\n".join(lines) + "\n").encode("utf-8"))
+        self.proc.stdin.flush()
+        output = bytearray()
+        fd = self.proc.stdout.fileno()
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise OSError("exiftool exited unexpectedly")
+            output += chunk
+            end = output.rfind(marker)
+            if end != -1 and not output[end + len(marker):].strip():
+                return bytes(output[:end])
+
+    def close(self):
+        """Ask exiftool to exit, killing it if it does not within a few seconds"""
+        try:
+            self.proc.stdin.write(b"-stay_open\nFalse\n")
+            self.proc.stdin.flush()
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except Exception:
+            self.proc.kill()
+
+class ExifToolPool:
+    """exiftool sessions shared by the worker threads of this process.
+    A session is spawned only when every existing one is busy, so the pool grows to
+    the number of workers handling CR3 files at the same time and no further."""
+    _idle = []
+    _sessions = []
+    _lock = threading.Lock()
+    _atexit_registered = False
+
+    @classmethod
+    def execute(cls, *args):
+        with cls._lock:
+            session = cls._idle.pop() if cls._idle else None
+        if session is None:
+            session = ExifToolSession()
+            with cls._lock:
+                cls._sessions.append(session)
+                if not cls._atexit_registered:
+                    import atexit
+                    atexit.register(cls.close)
+                    cls._atexit_registered = True
+        try:
+            output = session.execute(*args)
+        except Exception:
+            # A broken session is never reused
+            with cls._lock:
+                if session in cls._sessions:
+                    cls._sessions.remove(session)
+            session.close()
+            raise
+        with cls._lock:
+            cls._idle.append(session)
+        return output
+
+    @classmethod
+    def close(cls):
+        """Shut down every session (batch end, Ctrl+C and interpreter exit)"""
+        with cls._lock:
+            sessions, cls._sessions, cls._idle = cls._sessions, [], []
+        for session in sessions:
+            session.close()
+
+    @classmethod
+    @contextlib.contextmanager
+    def batch(cls):
+        """Close the sessions when a batch ends, however it ends"""
+        try:
+            yield cls
+        finally:
+            cls.close()
+
+def read_cr3_preview(cr3_path):
+    """Preview JPEG bytes and numeric EXIF orientation of a CR3, in one exiftool request"""
+    output = ExifToolPool.execute('-json', '-b', '-PreviewImage', '-Orientation#', cr3_path)
+    record = json.loads(output.decode("utf-8"))[0]
+    preview = record.get('PreviewImage')
+    if not isinstance(preview, str) or not preview.startswith('base64:'):
+        return None, None
+    orientation_value = record.get('Orientation')
+    return base64.b64decode(preview[len('base64:'):]), orientation_value if isinstance(orientation_value, int) else None
+
+def load_cr3_preview(cr3_path):
+    """Embedded JPEG bytes and orientation of a CR3, parsed in-process.
+    exiftool is only asked when the container cannot be read. Returns (None, None) on failure."""
     try:
-        with open(temp_path, "wb") as f:
-            subprocess.run(['exiftool', '-b', '-PreviewImage', cr3_path], stdout=f, check=True)
+        return read_cr3_embedded(cr3_path)
+    except (OSError, ValueError, struct.error):
+        pass
+    if not has_exiftool():
+        return None, None
+    try:
+        return read_cr3_preview(cr3_path)
     except Exception as e:
         print(f"{Fore.RED}  [!] Exiftool failed to extract preview: {str(e)}")
         return None, None
 
-    # Securely get orientation
-    try:
-        orientation_output = subprocess.check_output(
-            ['exiftool', '-S', '-Orientation#', cr3_path],
-            stderr=subprocess.DEVNULL
-        ).decode().strip()
-        
-        # Orientation format is usually "Orientation: N" or just "N" with -S
-        if orientation_output:
-            val = orientation_output.split()[-1]
-            orientation_value = int(val)
-        else:
-            orientation_value = None
-    except Exception:
-        orientation_value = None
-        
-    return temp_path if os.path.exists(temp_path) else None, orientation_value
-
-def apply_exif_orientation(image):
+def get_exif_orientation(image):
+    """Return the EXIF orientation value of an opened image (None if absent)"""
     try:
         for orientation in ExifTags.TAGS.keys():
             if ExifTags.TAGS[orientation] == 'Orientation':
                 break
         exif = image._getexif()
         if exif is not None:
-            orientation_value = exif.get(orientation, None)
-            if orientation_value == 3:
-                image = image.rotate(180, expand=True)
-            elif orientation_value == 6:
-                image = image.rotate(270, expand=True)
-            elif orientation_value == 8:
-                image = image.rotate(90, expand=True)
+            return exif.get(orientation, None)
     except (AttributeError, KeyError, IndexError):
         pass
+    return None
+
+# EXIF orientation -> transpose that displays the image upright
+ORIENTATION_TRANSPOSE = {3: Image.ROTATE_180, 6: Image.ROTATE_270, 8: Image.ROTATE_90}
+
+def orient(image, orientation_value):
+    """Apply a known EXIF orientation. Returns the same image (no copy) when upright."""
+    if orientation_value in ORIENTATION_TRANSPOSE:
+        return image.transpose(ORIENTATION_TRANSPOSE[orientation_value])
+    return image
+
+def display_box_to_stored(box, stored_size, orientation_value):
+    """Map a (left, top, right, bottom) box from display space to stored pixel space"""
+    left, top, right, bottom = box
+    stored_w, stored_h = stored_size
+    if orientation_value == 3:
+        return (stored_w - right, stored_h - bottom, stored_w - left, stored_h - top)
+    if orientation_value == 6:
+        return (top, stored_h - right, bottom, stored_h - left)
+    if orientation_value == 8:
+        return (stored_w - bottom, left, stored_w - top, right)
+    return box
+
+def resize_oriented(image, size, resample, orientation_value=None, box=None, reducing_gap=None, timer=NO_TIMER):
+    """Resize to a display-space `size` and orient in one step: the resample runs on
+    the stored pixels and only the (smaller) result is transposed. With a display-space
+    `box`, only that region is resampled (crop and resize in one pass). No copy is
+    made when neither the size, the region nor the orientation changes.
+    `reducing_gap` enables Pillow's integer box pre-reduction before the final filter.
+    `timer` (a StageTimer) is charged for the crop, resize and orientation steps."""
+    if orientation_value in (6, 8):
+        size = (size[1], size[0])
+    if box is not None:
+        left, top, right, bottom = display_box_to_stored(box, image.size, orientation_value)
+        # Clamp float rounding at the edges
+        box = (max(0, left), max(0, top), min(image.width, right), min(image.height, bottom))
+        if (box[2] - box[0], box[3] - box[1]) == size and all(float(v).is_integer() for v in box):
+            image = image.crop(tuple(int(v) for v in box)) # Same scale: a plain crop
+            timer.lap("crop")
+        else:
+            image = image.resize(size, resample, box=box, reducing_gap=reducing_gap)
+            timer.lap("resize")
+    elif image.size != size:
+        image = image.resize(size, resample, reducing_gap=reducing_gap)
+        timer.lap("resize")
+    if orientation_value in ORIENTATION_TRANSPOSE:
+        image = orient(image, orientation_value)
+        timer.lap("orientation")
     return image
 
-def crop_to_ratio_with_anchor(img, target_ratio, anchor='center'):
-    width, height = img.size
+# Resize strategies: "lanczos" filters from full resolution in one pass;
+# "reduce" first box-reduces by an integer factor (Image.reduce), keeping at least
+# `reducing_gap` times the target size, then runs LANCZOS on the smaller image.
+RESIZE_STRATEGIES = ("lanczos", "reduce")
+DEFAULT_REDUCING_GAP = 3.0
+
+def validate_resize_strategy(settings, source):
+    """Warn about an unknown `resize_strategy` in loaded settings and drop it
+    (so the default single LANCZOS pass applies visibly, not silently)"""
+    strategy = settings.get('resize_strategy')
+    if strategy is not None and strategy not in RESIZE_STRATEGIES:
+        print(f"{Fore.YELLOW}[!] {source}: unknown resize_strategy '{strategy}' "
+              f"(expected {' or '.join(RESIZE_STRATEGIES)}), using lanczos{Style.RESET_ALL}")
+        del settings['resize_strategy']
+    return settings
+
+def get_reducing_gap(settings):
+    """Pillow reducing_gap for a profile's resize strategy (None for a single LANCZOS pass)"""
+    if settings.get('resize_strategy', 'lanczos') != 'reduce':
+        return None
+    return float(settings.get('reducing_gap', DEFAULT_REDUCING_GAP))
+
+def apply_draft_decode(image, target_short_edge):
+    """Request a reduced-resolution decode for large downscales.
+    JPEG decodes straight at the smallest DCT scale (1/2, 1/4, 1/8) that keeps
+    the short edge at or above the target. Formats without scaled decoding
+    (PNG, TIFF, HEIC via pillow-heif, ...) are left untouched.
+    Must be called before the pixels are loaded. Returns True if applied."""
+    width, height = image.size
+    short_edge = min(width, height)
+    if short_edge <= target_short_edge:
+        return False
+    ratio = target_short_edge / short_edge
+    requested = (math.ceil(width * ratio), math.ceil(height * ratio))
+    try:
+        return image.draft(None, requested) is not None and image.size != (width, height)
+    except (AttributeError, ValueError, OSError):
+        return False
+
+def get_crop_box(size, target_ratio, anchor='center'):
+    """(left, top, right, bottom) of the largest `target_ratio` region of an image
+    of `size`, placed by `anchor`"""
+    width, height = size
     target_w, target_h = target_ratio
     target_aspect = target_w / target_h
     current_aspect = width / height
@@ -396,7 +928,7 @@ def crop_to_ratio_with_anchor(img, target_ratio, anchor='center'):
         'bottom': height - new_height
     }[anchor.split('-')[0]]
 
-    return img.crop((left, top, left + new_width, top + new_height))
+    return (left, top, left + new_width, top + new_height)
 
 # === Main Menu ===
 def save_profile(settings, name):
@@ -463,7 +995,7 @@ def list_profiles():
                         profiles.append({
                             "name": data["profile_name"],
                             "filename": filename,
-                            "settings": data["settings"]
+                            "settings": validate_resize_strategy(data["settings"], f"Profile '{data['profile_name']}'")
                         })
             except: continue
     return sorted(profiles, key=lambda x: x['name'].lower())
@@ -490,7 +1022,8 @@ def show_main_menu():
         print("  [1] Manual Configuration (Full Control)")
         print("  [2] Smart Mode (Auto-Suggestions)")
         print("  [3] Import from JSON (Load Log/Profile)")
-        if HAS_WATCHDOG:
+        has_watchdog = is_installed("watchdog")
+        if has_watchdog:
             print("  [W] Watchdog Mode 🐕 (Auto-Process New Files)")
         
         profiles = list_profiles()
@@ -498,6 +1031,8 @@ def show_main_menu():
             print(f"\n{Fore.GREEN}{Style.BRIGHT}FAST TRACK (YOUR PROFILES):{Style.RESET_ALL}")
             for i, profile in enumerate(profiles):
                 print(f"  [{i+4}] Profile: {profile['name']}")
+            if len(profiles) > 1:
+                print("  [M] Multi-Profile Batch (several profiles, one pass)")
             
         print(f"\n{Fore.WHITE}{Style.BRIGHT}MANAGEMENT:{Style.RESET_ALL}")
         print("  [P] Create New Profile")
@@ -511,12 +1046,25 @@ def show_main_menu():
         if choice in ('1', ''): return 'manual'
         if choice == '2': return 'smart'
         if choice == '3': return 'import'
-        if choice == 'w' and HAS_WATCHDOG: return 'watchdog'
+        if choice == 'w' and has_watchdog: return 'watchdog'
         if choice == 'p': return 'create_profile'
         if choice == 'l': view_most_recent_log(); continue
         if choice == 'h': show_help_screen(); continue
         if choice == 'q': sys.exit()
         
+        if choice == 'm' and len(profiles) > 1:
+            selection = input(f"{Fore.YELLOW}Profile numbers to run together (e.g. 4,5,7) or [A]ll: {Style.RESET_ALL}").strip().lower()
+            if selection in ('a', 'all'):
+                return profiles
+            try:
+                chosen = [profiles[int(x) - 4] for x in selection.split(',') if x.strip() and 4 <= int(x) < 4 + len(profiles)]
+            except ValueError:
+                chosen = []
+            if chosen:
+                return chosen
+            print(f"{Fore.RED}[!] Invalid selection.")
+            continue
+        
         if choice == 'd':
             if not profiles:
                 print(f"{Fore.RED}[!] No profiles to delete.")
@@ -621,7 +1169,10 @@ def main():
             continue
             
         # Determine mode and settings
-        if isinstance(mode_or_settings, dict):
+        if isinstance(mode_or_settings, list):
+            settings = mode_or_settings
+            mode = "Multi-Profile"
+        elif isinstance(mode_or_settings, dict):
             settings = mode_or_settings
             mode = "Fast Track Profile"
         elif mode_or_settings == 'manual':
@@ -645,14 +1196,26 @@ def main():
         # === File scanning logic ===
         # If recursion is requested, we MUST scan (or re-scan) recursively.
         # Otherwise, scan if we haven't yet.
-        recursive_requested = settings.get('recursive', False)
+        if isinstance(settings, list):
+            recursive_requested = any(p['settings'].get('recursive', False) for p in settings)
+            scan_order = settings[0]['settings'].get('scan_order', 'sorted')
+        else:
+            recursive_requested = settings.get('recursive', False)
+            scan_order = settings.get('scan_order', 'sorted')
+        # "sorted" (default) scans everything up front; "unsorted" skips the sort;
+        # "streaming" starts processing as soon as the first file is found
+        streaming = scan_order == 'streaming'
         
-        # If recursive active, force a new scan. If not recursive, only scan if missing.
-        if recursive_requested:
-             image_files = scan_for_images(input_folder, recursive=True)
+        # If recursive active or streaming, force a new scan. If not recursive, only scan if missing.
+        # A stream is single-use, so it lives in its own local and never in image_files.
+        if streaming:
+             stream = scan_for_images(input_folder, recursive=recursive_requested, sort=False, stream=True)
+             if not stream: continue
+        elif recursive_requested:
+             image_files = scan_for_images(input_folder, recursive=True, sort=scan_order == 'sorted')
              if not image_files: continue
         elif 'image_files' not in locals():
-            image_files = scan_for_images(input_folder, recursive=False)
+            image_files = scan_for_images(input_folder, recursive=False, sort=scan_order == 'sorted')
             if not image_files: continue
             
         # === One-Image Test Option ===
@@ -664,6 +1227,14 @@ def main():
         batch_choice = input(f"\n{Fore.YELLOW}Choice: {Style.RESET_ALL}").strip().lower()
         if batch_choice == 'b': continue
         if batch_choice == 't':
+            if streaming:
+                first = next(stream)
+                process_images(input_folder, [first], settings, mode, is_test=True)
+                print(f"\n{Fore.GREEN}[TEST COMPLETE] Verification image saved.")
+                proceed = input(f"{Fore.CYAN}Proceed with the remaining images? (y/n) [default y]: {Style.RESET_ALL}").strip().lower()
+                if proceed not in ('n', 'no'):
+                    process_images(input_folder, stream, settings, mode)
+                continue
             process_images(input_folder, image_files[:1], settings, mode, is_test=True)
             
             # Post-test prompt
@@ -676,7 +1247,7 @@ def main():
             continue
             
         # Start full process
-        process_images(input_folder, image_files, settings, mode)
+        process_images(input_folder, stream if streaming else image_files, settings, mode)
         
         # Post-process: Offer to save settings as profile if it was manual
         if mode == "Manual Configuration":
@@ -695,53 +1266,71 @@ def main():
         if 'image_files' in locals():
              del image_files
 
-def scan_for_images(input_folder, recursive=False):
-    """Helper to scan for images and handle empty results. Returns relative paths."""
+SUPPORTED_EXTS = (
+    '.png', '.jpg', '.jpeg', '.webp', '.cr3',
+    '.bmp', '.tif', '.tiff', '.ico',
+    '.ppm', '.pgm', '.pbm', '.tga', '.avif', '.heic'
+)
+
+def iter_images(input_folder, recursive=False, counts=None):
+    """Yield image paths relative to input_folder as os.scandir finds them (directory order).
+    Memory stays constant however large the tree; `counts["irrelevant"]` tallies skipped files."""
+    pending_dirs = [""]
+    while pending_dirs:
+        rel_dir = pending_dirs.pop()
+        try:
+            with os.scandir(os.path.join(input_folder, rel_dir)) as entries:
+                for entry in entries:
+                    rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if recursive:
+                            pending_dirs.append(rel_path)
+                    elif entry.name.lower().endswith(SUPPORTED_EXTS):
+                        yield rel_path
+                    elif counts is not None and entry.name != '.DS_Store':
+                        counts["irrelevant"] = counts.get("irrelevant", 0) + 1
+        except OSError:
+            continue
+
+def scan_for_images(input_folder, recursive=False, sort=True, stream=False):
+    """Helper to scan for images and handle empty results. Returns relative paths.
+    `sort=False` keeps directory order; `stream=True` returns an iterator that scans
+    lazily, so processing can start with the first file found."""
     search_type = "Recursive" if recursive else "Standard"
-    print(f"\n{Fore.CYAN}[INFO] {search_type} scan in '{input_folder}'...")
-    
-    supported_exts = (
-        '.png', '.jpg', '.jpeg', '.webp', '.cr3',
-        '.bmp', '.tif', '.tiff', '.ico',
-        '.ppm', '.pgm', '.pbm', '.tga', '.avif', '.heic'
-    )
+    print(f"\n{Fore.CYAN}[INFO] {search_type} {'streaming ' if stream else ''}scan in '{input_folder}'...")
     
     if not os.path.isdir(input_folder):
         print(f"{Fore.RED}[!] Input folder '{input_folder}' not found.")
         return None
     
-    image_files = []
-    irrelevant_count = 0
-    
-    if recursive:
-        for root, dirs, files in os.walk(input_folder):
-            for f in files:
-                rel_path = os.path.relpath(os.path.join(root, f), input_folder)
-                if f.lower().endswith(supported_exts):
-                    image_files.append(rel_path)
-                else:
-                    if f != '.DS_Store': irrelevant_count += 1
+    counts = {"irrelevant": 0}
+    found = iter_images(input_folder, recursive, counts)
+    if stream:
+        first = next(found, None)
+        image_files = [first] if first else []
     else:
-        all_files = os.listdir(input_folder)
-        for f in all_files:
-            if f.lower().endswith(supported_exts):
-                image_files.append(f)
-            else:
-                if f != '.DS_Store' and not os.path.isdir(os.path.join(input_folder, f)):
-                    irrelevant_count += 1
-    
-    print(f"{Fore.GREEN}[OK] Images found: {len(image_files)}")
-    if irrelevant_count > 0:
-        print(f"{Fore.YELLOW}[!] Non-image files: {irrelevant_count}")
+        image_files = list(found)
+        print(f"{Fore.GREEN}[OK] Images found: {len(image_files)}")
+        if counts["irrelevant"] > 0:
+            print(f"{Fore.YELLOW}[!] Non-image files: {counts['irrelevant']}")
     
     if not image_files:
         print(f"{Fore.RED}[!] No supported images found in '{input_folder}'.")
-        print(f"{Fore.YELLOW}[TIP] Supported formats: {', '.join(supported_exts).upper()}")
+        print(f"{Fore.YELLOW}[TIP] Supported formats: {', '.join(SUPPORTED_EXTS).upper()}")
         input(f"\n{Fore.YELLOW}Press Enter to return to menu...{Style.RESET_ALL}")
         return None
+    
+    if stream:
+        print(f"{Fore.GREEN}[OK] First image found: {image_files[0]} (scan continues during processing)")
+        return itertools.chain(image_files, found)
         
     # Sort for consistency
-    image_files.sort()
+    if sort:
+        image_files.sort()
     return image_files
 
 def get_settings():
@@ -929,6 +1518,49 @@ def get_settings():
         recursive = recursive_input in ('', 'y', 'yes')
         break
 
+    # Responsive Widths
+    responsive_widths = None
+    while True:
+        print("\n" + Fore.CYAN + "─" * 60 + Style.RESET_ALL)
+        print_current_selections(output_format, size, quality, aspect=aspect_desc, upscale=allow_upscale, recursive=recursive)
+        print(Fore.CYAN + "[RESPONSIVE] Responsive Widths")
+        print(f"{Fore.YELLOW}[TIP] srcset Output:")
+        print("   • No: One image per source at the size chosen above")
+        print(f"   • Yes: Several widths from one decode (default {', '.join(str(w) for w in DEFAULT_RESPONSIVE_WIDTHS)})")
+        
+        responsive_input = input("Emit responsive widths? (y/n/B/Q) [default n]: ").strip().lower()
+        if responsive_input == 'q': sys.exit()
+        if responsive_input == 'b': return 'back'
+        if responsive_input == 'h':
+            show_help_screen()
+            continue
+        if responsive_input in ('y', 'yes'):
+            widths_input = input(f"{Fore.YELLOW}Widths, comma separated [default {','.join(str(w) for w in DEFAULT_RESPONSIVE_WIDTHS)}]: {Style.RESET_ALL}").strip()
+            try:
+                responsive_widths = [int(w) for w in widths_input.split(',') if w.strip()] or DEFAULT_RESPONSIVE_WIDTHS
+            except ValueError:
+                print(f"{Fore.YELLOW}Defaulting to {', '.join(str(w) for w in DEFAULT_RESPONSIVE_WIDTHS)}")
+                responsive_widths = DEFAULT_RESPONSIVE_WIDTHS
+        break
+
+    # Processing Engine
+    while True:
+        print("\n" + Fore.CYAN + "─" * 60 + Style.RESET_ALL)
+        print_current_selections(output_format, size, quality, aspect=aspect_desc, upscale=allow_upscale, recursive=recursive)
+        print(Fore.CYAN + "[ENGINE] Processing Engine")
+        print(f"{Fore.YELLOW}[TIP] Performance:")
+        print("   • Threads: Low overhead, best for small batches")
+        print("   • Processes: Uses every CPU core, best for large batches")
+        
+        engine_input = input("Use the multi-process engine? (y/n/B/Q) [default n]: ").strip().lower()
+        if engine_input == 'q': sys.exit()
+        if engine_input == 'b': return 'back'
+        if engine_input == 'h':
+            show_help_screen()
+            continue
+        engine = "process" if engine_input in ('y', 'yes') else "thread"
+        break
+
     # Final Confirmation
     print("\n" + Fore.GREEN + "══ CONFIGURATION COMPLETE ══" + Style.RESET_ALL)
     print(f" Format:    {format_options.get(next(k for k,v in format_options.items() if v==output_format), output_format)}") # Re-derive key for display or just show format
@@ -937,6 +1569,8 @@ def get_settings():
     print(f" Upscale:   {allow_upscale}")
     print(f" Crop:      {f'{aspect[0]}:{aspect[1]}' if crop_input == 'y' else 'No'}")
     print(f" Recursive: {recursive}")
+    print(f" Widths:    {', '.join(f'{w}w' for w in responsive_widths) if responsive_widths else 'Single size'}")
+    print(f" Engine:    {engine.title()}")
     
     confirm = input(f"\n{Fore.YELLOW}Start processing with these settings? (y/n) [default y]: {Style.RESET_ALL}").strip().lower()
     if confirm not in ('', 'y', 'yes'):
@@ -952,7 +1586,10 @@ def get_settings():
             "aspect": aspect,
             "anchor": anchor,
             "allow_upscale": allow_upscale,
-            "recursive": recursive
+            "recursive": recursive,
+            "responsive": bool(responsive_widths),
+            "responsive_widths": responsive_widths,
+            "engine": engine
         }
     else:
         return {
@@ -964,7 +1601,10 @@ def get_settings():
             "aspect": None,
             "anchor": None,
             "allow_upscale": allow_upscale,
-            "recursive": recursive
+            "recursive": recursive,
+            "responsive": bool(responsive_widths),
+            "responsive_widths": responsive_widths,
+            "engine": engine
         }
 
 def get_smart_settings(image_files):
@@ -986,7 +1626,8 @@ def get_smart_settings(image_files):
         "anchor": None,
         "allow_upscale": False,
         "recursive": True,
-        "smart_optimize": True # Enable RMS Visual Check
+        "smart_optimize": True, # Enable RMS Visual Check
+        "resize_strategy": "reduce" # Box pre-reduction before LANCZOS for big downscales
     }
     
     print(f"\n{Fore.YELLOW}Suggested Settings:")
@@ -994,6 +1635,7 @@ def get_smart_settings(image_files):
     print(f"  Size:    {settings['size']}px")
     print(f"  Quality: {settings['quality']}%")
     print(f"  Crop:    {'No'}")
+    print(f"  Resize:  Two-stage (reduce + LANCZOS)")
     print(f"  Recursive: {'Yes'}") # Suggest Yes for smart settings
     
     confirm = input(f"\n{Fore.CYAN}Use these settings? (y/n/B) [default y]: ").strip().lower()
@@ -1004,8 +1646,691 @@ def get_smart_settings(image_files):
         print(f"{Fore.YELLOW}Switching to Manual Configuration...")
         return get_settings()
 
-def process_images(input_folder, image_files, settings, mode, is_test=False, custom_output_folder=None):
-    """Process images with given settings and rich logging"""
+# === Size Variants ===
+DEFAULT_RESPONSIVE_WIDTHS = [320, 640, 1280, 1920]
+
+def get_size_variants(settings):
+    """Output variants for a batch: one short-edge target, or (responsive mode)
+    one variant per srcset width, largest first"""
+    if settings.get('responsive'):
+        widths = sorted({int(w) for w in settings.get('responsive_widths') or DEFAULT_RESPONSIVE_WIDTHS if int(w) > 0}, reverse=True)
+        return [{"name": f"{w}w", "width": w} for w in widths]
+    return [{"name": "", "size": settings['size']}]
+
+def get_kept_width(settings, width, height):
+    """Width left after the aspect crop, for full-resolution oriented dimensions"""
+    if settings.get('crop'):
+        aspect_w, aspect_h = settings['aspect']
+        return min(width, round(height * aspect_w / aspect_h))
+    return width
+
+def plan_size_variants(settings, width, height):
+    """The variants this image will actually produce. Responsive widths wider
+    than the source are dropped unless upscaling is allowed; if none remain
+    the image is emitted once at its own width."""
+    variants = get_size_variants(settings)
+    if not settings.get('responsive') or not width:
+        return variants
+    kept_width = get_kept_width(settings, width, height)
+    planned = [v for v in variants if v['width'] <= kept_width or settings.get('allow_upscale')]
+    return planned or [{"name": f"{kept_width}w", "width": kept_width}]
+
+def get_decode_short_edge(settings, variants, width, height):
+    """Smallest short edge the decoder must deliver for this image's largest output"""
+    if not settings.get('responsive'):
+        return settings['size']
+    return math.ceil(variants[0]['width'] * min(width, height) / get_kept_width(settings, width, height))
+
+def resize_to_short_edge(img, width, height, final_short_edge, allow_upscale, orientation=None, crop=None, reducing_gap=None, timer=NO_TIMER):
+    """The standard single-size resize. `width`/`height` are the full-resolution
+    oriented dimensions; img holds the stored (possibly draft-reduced) pixels and
+    is oriented as part of the resize. With `crop` = (aspect, anchor) the crop box
+    is placed on the resized geometry and mapped back to the source, so only the
+    kept region is resampled. Returns (new_img, action, description)."""
+    short_edge = min(width, height)
+    action, emoji_tag, description = get_resize_action_and_emoji(short_edge, final_short_edge, allow_upscale)
+    display_w, display_h = (img.height, img.width) if orientation in (6, 8) else img.size
+
+    if (short_edge <= final_short_edge and not allow_upscale) or short_edge == final_short_edge:
+        # Keep original size if smaller and upscaling not allowed (no copy unless it needs rotating)
+        new_width, new_height = display_w, display_h
+        resample = None
+    else:
+        # Perform resize
+        if width < height:
+            new_width = final_short_edge
+            new_height = int((final_short_edge / width) * height)
+        else:
+            new_height = final_short_edge
+            new_width = int((final_short_edge / height) * width)
+        resample = Image.BICUBIC if short_edge < final_short_edge else Image.LANCZOS
+
+    if crop:
+        left, top, right, bottom = get_crop_box((new_width, new_height), *crop)
+        scale_x, scale_y = display_w / new_width, display_h / new_height
+        box = (left * scale_x, top * scale_y, right * scale_x, bottom * scale_y)
+        new_img = resize_oriented(img, (right - left, bottom - top), resample or Image.LANCZOS, orientation, box, reducing_gap, timer)
+    elif resample is None:
+        new_img = orient(img, orientation)
+        if orientation in ORIENTATION_TRANSPOSE:
+            timer.lap("orientation")
+    else:
+        new_img = resize_oriented(img, (new_width, new_height), resample, orientation, reducing_gap=reducing_gap, timer=timer)
+    return new_img, action, description
+
+def render_responsive_variants(img, width, variants, allow_upscale, orientation=None, crop=None, reducing_gap=None, timer=NO_TIMER):
+    """Cascade resize for srcset widths: each width is resampled from the next
+    larger one, so the full-resolution image is filtered only once.
+    `width` is the full-resolution display width of the kept region; img is oriented
+    (and cropped to `crop` = (aspect, anchor)) by its first resize.
+    Returns [(variant, new_img, action, description)]."""
+    display_w, display_h = (img.height, img.width) if orientation in (6, 8) else img.size
+    box = get_crop_box((display_w, display_h), *crop) if crop else (0, 0, display_w, display_h)
+    region_w, region_h = box[2] - box[0], box[3] - box[1]
+    renders = []
+    current, current_orientation, current_box = img, orientation, box
+    for variant in variants:
+        target = variant['width']
+        action, _, description = get_resize_action_and_emoji(width, target, allow_upscale)
+        size = (target, max(1, round(region_h * target / region_w)))
+        if target > region_w:
+            new_img = resize_oriented(img, size, Image.BICUBIC, orientation, box, timer=timer)
+        else:
+            new_img = resize_oriented(current, size, Image.LANCZOS, current_orientation, current_box, reducing_gap, timer)
+            current, current_orientation, current_box = new_img, None, None
+        renders.append((variant, new_img, action, description))
+    return renders
+
+def save_output(new_img, output_path, settings, has_alpha, timer=NO_TIMER):
+    """Encode one output image, running the smart quality search when enabled.
+    The file is replaced, not rewritten in place, so outputs restored as
+    hardlinks never change under the cache entries that share them.
+    Returns (used_quality, smart_tag, smart_trials)."""
+    save_kwargs = {"quality": settings['quality'], "optimize": True}
+    if settings['format'] == "WEBP":
+        save_kwargs["lossless"] = has_alpha
+        save_kwargs["method"] = 6  # Best compression
+
+    if settings['format'] in ["JPEG", "PDF", "AVIF"]:
+        if new_img.mode != "RGB":
+            new_img = new_img.convert("RGB")
+            timer.lap("alpha")
+
+    # Encode next to the output and rename over it, never writing through an existing file
+    tmp_path = output_path + ".tmp"
+
+    # === Smart Quality Validation ===
+    used_quality = settings['quality']
+    smart_tag = ""
+    smart_trials = 0
+
+    try:
+        if settings.get('smart_optimize', False) and settings['format'] in ['JPEG', 'WEBP'] and not save_kwargs.get('lossless'):
+            # Search for the lowest quality that stays visually identical.
+            # Candidates are encoded in memory; only the winner touches the disk.
+            try:
+                metric = MetricEngine(new_img, settings.get('smart_metric', 'rms'), settings.get('smart_metric_max_side', 0),
+                                      settings.get('smart_metric_band_step', MetricEngine.BAND_STEP))
+                threshold = settings.get('smart_threshold')
+                if threshold is None or metric.metric != settings.get('smart_metric', 'rms'):
+                    threshold = METRIC_THRESHOLDS[metric.metric]
+                winner, smart_trials = smart_quality_search(
+                    new_img, settings['format'], save_kwargs,
+                    max_quality=used_quality,
+                    min_quality=settings.get('smart_min_quality', max(50, used_quality - 30)),
+                    metric=metric,
+                    threshold=threshold,
+                    max_trials=settings.get('smart_max_trials', 6)
+                )
+            except Exception:
+                winner = None
+            timer.lap("smart")
+            if winner:
+                used_quality, data, score = winner
+                smart_tag = f" [Smart: Q{used_quality} | {metric.metric.upper()} {score:.3f} | {smart_trials} trials]"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+            else:
+                # Nothing lower passed the threshold, keep standard
+                if smart_trials:
+                    smart_tag = f" [Smart: Q{used_quality} kept | {smart_trials} trials]"
+                new_img.save(tmp_path, format=settings['format'], **save_kwargs)
+        else:
+            # Standard Save
+            new_img.save(tmp_path, format=settings['format'], **save_kwargs)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    # A new inode: the old output may be a DeltaSync hardlink to a cached file
+    os.replace(tmp_path, output_path)
+    timer.lap("encode")
+    return used_quality, smart_tag, smart_trials
+
+# === Metadata Probe ===
+def probe_image(path):
+    """Read header metadata once: stat identity, dimensions, mode, format, EXIF orientation"""
+    probe = {"bytes": 0, "mtime_ns": None, "inode": None, "width": None, "height": None,
+             "mode": None, "format": None, "orientation": None, "readable": False}
+    try:
+        st = os.stat(path)
+        probe["bytes"], probe["mtime_ns"], probe["inode"] = st.st_size, st.st_mtime_ns, st.st_ino
+        ensure_opener(path)
+        if path.lower().endswith('.cr3'):
+            # Geometry of the full-size JPEG that decode_and_render() will use
+            with open(path, 'rb') as f:
+                info = parse_cr3(f)
+            if info["jpeg"]:
+                probe["width"], probe["height"] = info["jpeg"][2:]
+                probe["mode"], probe["format"] = "RGB", "CR3"
+                probe["orientation"] = info["orientation"]
+                probe["readable"] = True
+            return probe
+        with Image.open(path) as img:
+            probe["width"], probe["height"] = img.size
+            probe["mode"] = img.mode
+            probe["format"] = img.format
+            probe["orientation"] = get_exif_orientation(img)
+            probe["readable"] = True
+    except Exception:
+        pass
+    return probe
+
+def get_oriented_size(probe):
+    """(width, height) of a probed image as displayed, i.e. after EXIF rotation"""
+    if probe["orientation"] in (6, 8):
+        return probe["height"], probe["width"]
+    return probe["width"], probe["height"]
+
+def probe_images(input_folder, image_files):
+    """Probe every file in parallel (header reads are I/O bound, so threads). Returns {filename: probe}"""
+    max_workers = min(32, (os.cpu_count() or 1) + 4)
+    paths = [os.path.join(input_folder, f) for f in image_files]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(image_files, executor.map(probe_image, paths)))
+
+def iter_probed(input_folder, image_files, probes=None, lookahead=16):
+    """Yield (filename, probe) in order. Without `probes` (a streamed scan) a small
+    thread pool reads headers `lookahead` files ahead of the consumer, so probes
+    overlap each other and the processing instead of running one by one on the
+    submitting thread."""
+    if probes is not None:
+        for f in image_files:
+            yield f, probes[f]
+        return
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(8, lookahead), thread_name_prefix="tq-probe")
+    ahead = collections.deque()
+    try:
+        for f in image_files:
+            ahead.append((f, executor.submit(probe_image, os.path.join(input_folder, f))))
+            if len(ahead) >= lookahead:
+                f, future = ahead.popleft()
+                yield f, future.result()
+        while ahead:
+            f, future = ahead.popleft()
+            yield f, future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# === Processing Engines ===
+# "thread": ThreadPoolExecutor (low overhead, best for I/O heavy or small batches)
+# "process": ProcessPoolExecutor (sidesteps the GIL for large CPU-bound batches).
+# Workers are spawned, not forked: the log writer, probe pool and watch threads
+# are already running when the pool starts, and forking a threaded process can deadlock.
+ENGINES = ("thread", "process")
+_WORKER_CONTEXT = None
+
+def _init_process_worker(context):
+    """Per-process worker setup: keep the job context (optional openers load per file)"""
+    global _WORKER_CONTEXT
+    _WORKER_CONTEXT = context
+    # Close this worker's exiftool sessions when the pool shuts it down
+    from multiprocessing import util
+    util.Finalize(None, ExifToolPool.close, exitpriority=10)
+
+def _process_item_in_worker(filename, probe=None):
+    """Picklable entry point for the process engine"""
+    return process_item(filename, _WORKER_CONTEXT, probe)
+
+def create_executor(engine, max_workers, context):
+    """Build the executor for the selected engine and a submit function bound to it"""
+    if engine == "process":
+        import multiprocessing
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process_worker,
+            initargs=(context,)
+        )
+        return executor, lambda f, probe=None: executor.submit(_process_item_in_worker, f, probe)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    return executor, lambda f, probe=None: executor.submit(process_item, f, context, probe)
+
+def get_max_workers(engine):
+    if engine == "process":
+        # Windows caps ProcessPoolExecutor at 61 workers
+        return min(61, os.cpu_count() or 1)
+    return min(32, (os.cpu_count() or 1) + 4)
+
+def select_engine(settings):
+    """The profile's engine (threads unless a known one is set) and its worker count"""
+    engine = settings.get('engine', 'thread')
+    if engine not in ENGINES: engine = 'thread'
+    return engine, settings.get('workers') or get_max_workers(engine)
+
+# === Concurrency Autotuning ===
+# Opt-in per profile ("autotune": true; a pinned "workers" value wins). The best
+# level found is remembered per profile and engine in the app config.
+def get_cpu_busy_seconds():
+    """CPU seconds spent busy so far: system-wide from /proc/stat where available
+    (so worker processes count), else this process's own CPU time"""
+    try:
+        with open('/proc/stat') as f:
+            ticks = [int(v) for v in f.readline().split()[1:9]] # user nice system idle iowait irq softirq steal
+        return (sum(ticks) - ticks[3] - ticks[4]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, AttributeError, IndexError):
+        return time.process_time()
+
+def get_autotune_bounds(engine, settings):
+    """(low, high) worker counts the tuner may choose from; the pool is sized to high"""
+    if engine == "process":
+        high = get_max_workers("process") # past one per core, processes only contend
+    else:
+        high = min(64, get_max_workers("thread") * 2) # headroom for I/O-bound inputs (network shares)
+    return 1, max(1, int(settings.get('autotune_max_workers', high)))
+
+def get_autotune_key(settings, engine):
+    names = settings if isinstance(settings, list) else [settings]
+    return f"{engine}:{'+'.join(s.get('name', '') for s in names)}"
+
+def load_autotuned_workers(key):
+    return load_app_config().get('autotune', {}).get(key, {}).get('workers')
+
+def save_autotuned_workers(key, tuner):
+    config = load_app_config()
+    config.setdefault('autotune', {})[key] = {"workers": tuner.best, "updated": datetime.now().isoformat()}
+    save_app_config(config)
+
+class ConcurrencyTuner:
+    """Hill-climbs the number of items in flight while a batch runs.
+    Each measurement window tries one step away from the accepted level and keeps
+    the move only if throughput rose by more than the noise tolerance, then keeps
+    climbing that way; otherwise it tries the other direction once and settles.
+    The first probe goes down when the CPU is saturated (extra workers only
+    contend for cores and memory bandwidth), up otherwise (I/O-bound inputs).
+    Throughput is weighted by each item's estimated pixel work, so a run of large
+    images does not read as a slowdown; images/sec is logged alongside."""
+    MIN_WINDOW_SECONDS = 1.0
+    MIN_WINDOW_ITEMS = 4
+    TOLERANCE = 0.05 # relative throughput change treated as noise
+    SATURATED = 0.9 # CPU utilization above which the first probe goes down
+    SETTLE_WINDOWS = 5 # windows a converged level is held before probing again
+    MAX_HISTORY = 100
+
+    def __init__(self, start, low, high):
+        self.low, self.high = low, high
+        self.start = self.best = self.level = min(high, max(low, start))
+        self.best_rate = None
+        self.probing = None # direction of the level under trial, None while measuring `best`
+        self.tried = set()
+        self.hold = 0
+        self.history = []
+        self._reset_window()
+
+    def _reset_window(self):
+        self.window_start = time.monotonic()
+        self.window_cpu = get_cpu_busy_seconds()
+        self.window_items = 0
+        self.window_work = 0
+
+    def completed(self, work):
+        self.window_items += 1
+        self.window_work += work
+
+    def update(self):
+        """Close the window once it is long enough and move to the next level.
+        Returns True when the level changed."""
+        elapsed = time.monotonic() - self.window_start
+        if elapsed < self.MIN_WINDOW_SECONDS or self.window_items < max(self.MIN_WINDOW_ITEMS, 2 * self.level):
+            return False
+        cpu = (get_cpu_busy_seconds() - self.window_cpu) / (elapsed * (os.cpu_count() or 1))
+        self.history.append({"workers": self.level, "images_per_sec": round(self.window_items / elapsed, 2), "cpu": round(min(cpu, 1.0), 2)})
+        del self.history[:-self.MAX_HISTORY]
+        previous = self.level
+        self.level = self._next_level(self.window_work / elapsed, cpu)
+        self._reset_window()
+        return self.level != previous
+
+    def _next_level(self, rate, cpu):
+        if self.probing is None:
+            self.best_rate = rate
+            if self.hold:
+                self.hold -= 1
+                return self.best
+            self.tried = set()
+            return self._probe(-1 if cpu >= self.SATURATED else 1)
+        if rate > self.best_rate * (1 + self.TOLERANCE):
+            self.best, self.best_rate = self.level, rate
+            self.tried = {-self.probing} # just came from there
+            return self._probe(self.probing)
+        self.tried.add(self.probing)
+        return self._probe(-self.probing)
+
+    def _probe(self, direction):
+        """Trial level one step from `best` in `direction`, or settle on `best`"""
+        for d in (direction, -direction):
+            if d in self.tried:
+                continue
+            level = min(self.high, max(self.low, self.best + d * max(1, self.best // 4)))
+            if level != self.best:
+                self.probing = d
+                return level
+            self.tried.add(d)
+        self.probing = None
+        self.hold = self.SETTLE_WINDOWS
+        return self.best
+
+    def summary(self):
+        return {"start": self.start, "chosen": self.best, "bounds": [self.low, self.high], "windows": self.history}
+
+# === Memory Budget ===
+# Jobs are admitted only while their estimated pixel memory fits the budget,
+# so worker counts can stay high for small images without OOM on huge ones.
+DEFAULT_ITEM_PIXELS = 24_000_000 # Unreadable headers (e.g. CR3): assume a full-size camera preview
+
+def get_memory_budget(settings):
+    """In-flight memory budget in bytes: `memory_budget_mb`, else half of physical RAM"""
+    budget_mb = settings.get('memory_budget_mb')
+    if budget_mb:
+        return int(budget_mb * 1024 * 1024)
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 2
+    except (AttributeError, ValueError, OSError):
+        return 4 * 1024 ** 3
+
+def estimate_item_memory(probe, working_copies=1):
+    """Peak pixel memory of one job from its header: the decoded image plus one
+    full-size RGBA working copy per distinct output format"""
+    if probe and probe["readable"]:
+        pixels = probe["width"] * probe["height"]
+        try:
+            bands = Image.getmodebands(probe["mode"])
+        except (KeyError, ValueError):
+            bands = 4
+    else:
+        pixels, bands = DEFAULT_ITEM_PIXELS, 4
+    return pixels * bands + pixels * 4 * working_copies
+
+def get_peak_rss_mb():
+    """Peak resident set size of this process or any finished child (MB), None if unavailable"""
+    if not HAS_RESOURCE:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024 # ru_maxrss is bytes on macOS, KB elsewhere
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return round(max(own, children) / (1024 * 1024), 1)
+
+def get_jobs(context):
+    """Per-profile jobs in a worker context: [{"name", "settings", "output_folder"}]"""
+    if context.get('jobs'):
+        return context['jobs']
+    return [{"name": context['settings'].get('name', ''), "settings": context['settings'], "output_folder": context['output_folder']}]
+
+def restore_cached_item(filename, job, session_id, input_hash, variants):
+    """Restore every variant of an input from the DeltaSync store.
+    Returns a success result, or None if anything is missing or the restore fails."""
+    settings = job['settings']
+    cached_entries = [DeltaSync.lookup(DeltaSync.variant_key(input_hash, v['name'])) for v in variants]
+    if not cached_entries or not all(c and os.path.exists(c['path']) for c in cached_entries):
+        return None
+
+    # Handle mirroring for output path
+    relative_dir = os.path.dirname(filename)
+    target_dir = os.path.join(job['output_folder'], relative_dir)
+    if relative_dir:
+        os.makedirs(target_dir, exist_ok=True)
+
+    try:
+        outputs = []
+        for variant, cached_entry in zip(variants, cached_entries):
+            new_filename = generate_web_friendly_filename(os.path.basename(filename), settings, session_id, variant)
+            output_path = os.path.join(target_dir, new_filename)
+            # Restore existing optimized file (reflink/hardlink where possible)
+            restored_with = DeltaSync.restore(cached_entry['path'], output_path, settings.get('restore_strategy', 'reflink'))
+            file_size = get_file_size_kb(output_path)
+            outputs.append({
+                "variant": variant['name'],
+                "size_kb": file_size,
+                "log_entry": {
+                    "file": filename,
+                    "original": "Cached",
+                    "result": "Cached",
+                    "action": "synced (cached)",
+                    "size_kb": file_size,
+                    "restore": restored_with
+                }
+            })
+    except:
+        return None # if restore fails, re-process
+
+    file_size = sum(o["size_kb"] for o in outputs)
+    # We simulate "success" result
+    return {
+        "status": "success",
+        "filename": filename,
+        "original_size": "Cached",
+        "final_size": "Cached",
+        "action": "synced (cached)",
+        "file_size": file_size,
+        "new_size_kb": file_size,
+        "restored_with": restored_with,
+        "variants": outputs,
+        "terminal_output": f"{Fore.CYAN}[SYNC]{Style.RESET_ALL} {filename:<30} | {'Cached':<10} | {file_size:>6} KB | Delta Sync Restore ({restored_with})"
+    }
+
+def prepare_mode(img, fmt):
+    """Convert a decoded image to the mode the output format needs. Returns (img, has_alpha).
+    The image is returned as-is (no copy) when it is already in that mode."""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        if img.mode == "P":
+            img = img.convert("RGBA")
+        if fmt in ["JPEG", "BMP", "TIFF"]: # These formats don't support alpha
+            bg = Image.new("RGB", img.size, (255, 255, 255))
+            bg.paste(img, mask=img.getchannel("A"))
+            return bg, True
+        return (img if img.mode == "RGBA" else img.convert("RGBA")), True # For formats like WEBP, PNG, keep alpha
+    return (img if img.mode == "RGB" else img.convert("RGB")), False # Ensure RGB for non-alpha images
+
+def render_item(filename, img, width, height, original_size_str, has_alpha, job, variants, session_id, input_hash, orientation=None, timer=NO_TIMER):
+    """Resize, crop and encode one decoded image for one profile.
+    `width`/`height` are the full-resolution oriented dimensions; img is still in
+    stored orientation and `orientation` is applied during the resize."""
+    settings = job['settings']
+
+    # Resize Logic
+    # Cropping is folded into the resize: only the kept region is resampled
+    crop = (settings['aspect'], settings['anchor']) if settings['crop'] else None
+    reducing_gap = get_reducing_gap(settings)
+    if settings.get('responsive'):
+        renders = render_responsive_variants(img, get_kept_width(settings, width, height), variants, settings.get('allow_upscale', False), orientation, crop, reducing_gap, timer)
+    else:
+        new_img, action, description = resize_to_short_edge(img, width, height, settings['size'], settings.get('allow_upscale', False), orientation, crop, reducing_gap, timer)
+        renders = [(variants[0], new_img, action, description)]
+
+    # Save
+    # Handle mirroring if dealing with relative paths
+    relative_dir = os.path.dirname(filename)
+    target_dir = os.path.join(job['output_folder'], relative_dir)
+    if relative_dir:
+        os.makedirs(target_dir, exist_ok=True)
+
+    outputs = []
+    for variant, new_img, action, description in renders:
+        new_filename = generate_web_friendly_filename(os.path.basename(filename), settings, session_id, variant)
+        output_path = os.path.join(target_dir, new_filename)
+
+        used_quality, smart_tag, smart_trials = save_output(new_img, output_path, settings, has_alpha, timer)
+        file_size = get_file_size_kb(output_path)
+        timer.wrote(output_path)
+
+        # Commit to the DeltaSync store as soon as the output exists
+        if input_hash:
+            DeltaSync.store(DeltaSync.variant_key(input_hash, variant['name']), output_path)
+        timer.lap("store")
+
+        outputs.append({
+            "variant": variant['name'],
+            "size_kb": file_size,
+            "log_entry": {
+                "file": filename,
+                "original": original_size_str,
+                "result": f"{new_img.width}x{new_img.height}",
+                "action": action,
+                "size_kb": file_size,
+                "quality": used_quality,
+                "smart_trials": smart_trials
+            },
+            "description": description,
+            "dimensions": f"{new_img.width}x{new_img.height}",
+            "smart_tag": smart_tag
+        })
+
+    primary = outputs[0]
+    total_kb = sum(o["size_kb"] for o in outputs)
+    if len(outputs) > 1:
+        detail = f"{len(outputs)} variants: {', '.join(o['variant'] for o in outputs)}"
+    else:
+        detail = f"{primary['description']}{primary['smart_tag']}"
+    return {
+        "status": "success",
+        "filename": filename,
+        "original_size": original_size_str,
+        "final_size": primary["dimensions"],
+        "action": primary["log_entry"]["action"],
+        "file_size": total_kb,
+        "variants": outputs,
+        "new_size_kb": total_kb,
+        "terminal_output": f"{Fore.GREEN}[OK]{Style.RESET_ALL} {filename:<30} | {primary['dimensions']:<10} | {total_kb:>6} KB | {detail}"
+    }
+
+def process_item(filename, context, probe=None):
+    """Process a single image for every profile in the context. Module-level so it can
+    run in a worker process. Returns one result per job, each carrying `input_bytes`
+    and `seconds` (wall time of the whole item, shared by its jobs); with stage timing
+    on, also `stages` (ms per stage), `bytes_read` and `bytes_written`.
+    `probe` is the record from probe_image(), read here when the caller has none."""
+    start = time.perf_counter()
+    timer = StageTimer() if any(job['settings'].get('stage_timing') for job in get_jobs(context)) else NO_TIMER
+    if probe is None:
+        probe = probe_image(os.path.join(context['input_folder'], filename))
+        timer.lap("probe")
+    results = decode_and_render(filename, context, probe, timer)
+    seconds = round(time.perf_counter() - start, 4)
+    for res in results:
+        res["input_bytes"] = probe["bytes"]
+        res["seconds"] = seconds
+        res.update(timer.record())
+    return results
+
+def decode_and_render(filename, context, probe=None, timer=NO_TIMER):
+    """Decode and orient an image once and fan it out to each job's
+    resize/crop/encode chain (DeltaSync hits are restored instead)"""
+    input_folder = context['input_folder']
+    session_id = context['session_id']
+    jobs = get_jobs(context)
+    img_path = os.path.join(input_folder, filename)
+    results = [{"status": "skipped", "size_kb": 0} for _ in jobs]
+
+    try:
+        # === Delta Sync Check ===
+        identity = None
+        if probe and probe["mtime_ns"] is not None:
+            identity = (probe["bytes"], probe["mtime_ns"], probe["inode"])
+        pending = []
+        for i, job in enumerate(jobs):
+            settings = job['settings']
+            if probe and probe["readable"]:
+                variants = plan_size_variants(settings, *get_oriented_size(probe))
+            else:
+                variants = get_size_variants(settings)
+            input_hash = DeltaSync.get_hash(img_path, settings, identity, timer)
+            timer.lap("hash")
+            cached = None
+            if input_hash:
+                cached = restore_cached_item(filename, job, session_id, input_hash, variants)
+                timer.lap("restore")
+            if cached:
+                results[i] = cached
+            else:
+                pending.append((i, job, input_hash))
+        if not pending:
+            return results
+
+        # Init Check
+        is_cr3 = filename.lower().endswith('.cr3')
+        orientation_value = None
+        source = img_path
+
+        if is_cr3:
+            # The embedded JPEG is decoded straight from memory, no temp file
+            preview, orientation_value = load_cr3_preview(img_path)
+            if not preview:
+                return [{"status": "skipped", "reason": "CR3 extraction failed"} for _ in jobs]
+            source = io.BytesIO(preview)
+            timer.read(len(preview))
+        else:
+            ensure_opener(img_path)
+            timer.read(probe["bytes"] if probe else os.path.getsize(img_path))
+
+        with Image.open(source) as img:
+            original_size = img.size
+            original_size_str = f"{original_size[0]}x{original_size[1]}"
+
+            # Full-resolution geometry after orientation (drives all resize math)
+            if is_cr3:
+                # From the CR3 itself; the embedded preview usually carries no EXIF
+                source_orientation = orientation_value if orientation_value is not None else get_exif_orientation(img)
+            elif probe and probe["readable"]:
+                source_orientation = probe["orientation"]
+            else:
+                source_orientation = get_exif_orientation(img)
+            if source_orientation in (6, 8):
+                width, height = original_size[1], original_size[0]
+            else:
+                width, height = original_size
+            plans = {i: plan_size_variants(job['settings'], width, height) for i, job, _ in pending}
+
+            # Reduced-resolution decode (JPEG DCT scaling), sized for the largest output of any profile
+            apply_draft_decode(img, max(get_decode_short_edge(job['settings'], plans[i], width, height) for i, job, _ in pending))
+            # Decode now: later stages may pass this very image through without copying it
+            img.load()
+            timer.lap("decode")
+
+            # Orientation is deferred to the resize, which transposes the smaller result
+
+            # Transparency (one conversion per distinct output format)
+            prepared = {}
+            for i, job, input_hash in pending:
+                fmt = job['settings']['format']
+                if fmt not in prepared:
+                    prepared[fmt] = prepare_mode(img, fmt)
+                    timer.lap("alpha")
+                job_img, has_alpha = prepared[fmt]
+                try:
+                    results[i] = render_item(filename, job_img, width, height, original_size_str, has_alpha, job, plans[i], session_id, input_hash, source_orientation, timer)
+                except Exception as e:
+                    results[i] = {"status": "failed", "reason": str(e)}
+
+        return results
+
+    except Exception as e:
+        return [r if r.get("status") == "success" else {"status": "failed", "reason": str(e)} for r in results]
+
+def process_images(input_folder, image_files, settings, mode, is_test=False, custom_output_folder=None, interactive=True):
+    """Process images with given settings and rich logging.
+    `settings` may also be a list of profiles ({"name", "settings"}): every image is then
+    decoded once and written by each profile into its own subfolder with its own logs.
+    `interactive=False` skips the confirmation and open-folder prompts (scripts, benchmarks)."""
     if is_test:
         print(f"\n{Fore.YELLOW}[TEST RUN] Processing a single image to verify quality...{Style.RESET_ALL}")
     
@@ -1019,41 +2344,94 @@ def process_images(input_folder, image_files, settings, mode, is_test=False, cus
         output_folder = os.path.join('resized_images', session_id)
     os.makedirs(output_folder, exist_ok=True)
     
-    # Setup detailed logging
-    log_data, settings_path = setup_logging(output_folder, settings, mode)
+    # One run per profile, each with its own output folder and detailed logging
+    multi_profile = isinstance(settings, list)
+    profiles = settings if multi_profile else [{"name": settings.get('name', ''), "settings": settings}]
+    runs = []
+    for profile in profiles:
+        run_folder = output_folder
+        if multi_profile:
+            safe_name = "".join(x for x in profile['name'] if x.isalnum() or x in (' ', '-', '_')).strip() or "Profile"
+            run_folder = os.path.join(output_folder, safe_name.replace(' ', '_'))
+            os.makedirs(run_folder, exist_ok=True)
+        log_data, settings_path, image_log = setup_logging(run_folder, profile['settings'], mode)
+        runs.append({
+            "name": profile['name'],
+            "settings": profile['settings'],
+            "output_folder": run_folder,
+            "log_data": log_data,
+            "settings_path": settings_path,
+            "image_log": image_log,
+            "processed": 0,
+            "output_kb": 0
+        })
+    settings = runs[0]["settings"] # Drives engine selection and the single-profile preview
     
     # === Pre-Process Analysis ===
-    if mode != "Watch":
-        print(f"\n{Fore.YELLOW}[INFO] Analyzing batch requirements...{Style.RESET_ALL}")
-    analysis = {"downscale": 0, "upscale": 0, "keep": 0, "failed": 0}
-    
-    for fname in image_files:
-        p_path = os.path.join(input_folder, fname)
-        try:
-            with Image.open(p_path) as p_img:
-                w, h = p_img.size
-                short = min(w, h)
-                action, _, _ = get_resize_action_and_emoji(short, settings['size'], settings.get('allow_upscale', False))
-                if action == "downscaled": analysis["downscale"] += 1
-                elif action == "upscaled": analysis["upscale"] += 1
-                else: analysis["keep"] += 1
-        except:
-            analysis["failed"] += 1
-
-    total_images = len(image_files)
+    print(f"\n{Fore.YELLOW}[INFO] Analyzing batch requirements...{Style.RESET_ALL}")
+    formats = {}
+    failed_count = 0
+    
+    # One parallel probe shared by the preview and the workers.
+    # A streamed file list is never materialised: it is probed just ahead of admission.
+    streaming = not isinstance(image_files, (list, tuple))
+    probes = {} if streaming else probe_images(input_folder, image_files)
+    for run in runs:
+        run["analysis"] = {"downscale": 0, "upscale": 0, "keep": 0}
+    for fname, probe in probes.items():
+        if not probe["readable"]:
+            failed_count += 1
+            continue
+        short = min(probe["width"], probe["height"])
+        for run in runs:
+            action, _, _ = get_resize_action_and_emoji(short, run["settings"]['size'], run["settings"].get('allow_upscale', False))
+            if action == "downscaled": run["analysis"]["downscale"] += 1
+            elif action == "upscaled": run["analysis"]["upscale"] += 1
+            else: run["analysis"]["keep"] += 1
+        formats[probe["format"]] = formats.get(probe["format"], 0) + 1
+    analysis = dict(runs[0]["analysis"], failed=failed_count)
+
+    total_images = None if streaming else len(image_files)
     processed_count = 0
     skipped_count = 0
     total_output_size = 0
     
-    # Prepare size variants (for now just one, but kept extensible)
-    size_variants = [{"name": "", "size": settings['size']}]
-    
-    if mode != "Watch":
+    # Prepare size variants (one per srcset width in responsive mode)
+    size_variants = get_size_variants(settings)
+    
+    if streaming:
+        # === Processing Preview (totals are unknown until the scan finishes) ===
+        print(f"\n{Fore.CYAN}{Style.BRIGHT}[PREVIEW] STREAMING PREVIEW:{Style.RESET_ALL}")
+        print(f"  • Images to process: streamed (scanning alongside processing)")
+        for run in runs:
+            s = run["settings"]
+            target = ', '.join(v['name'] for v in get_size_variants(s)) if s.get('responsive') else f"{s['size']}px"
+            print(f"  • {run['name'] or 'Output':<18} {s['format']} | {target} | Q{s['quality']}")
+        print(Fore.CYAN + "─" * 40 + Style.RESET_ALL)
+    elif multi_profile:
+        # === Processing Preview (one line per profile) ===
+        print(f"\n{Fore.CYAN}{Style.BRIGHT}[PREVIEW] MULTI-PROFILE PREVIEW:{Style.RESET_ALL}")
+        print(f"  • Images to process: {len(image_files)} (decoded once, written by {len(runs)} profiles)")
+        for run in runs:
+            s = run["settings"]
+            target = ', '.join(v['name'] for v in get_size_variants(s)) if s.get('responsive') else f"{s['size']}px"
+            crop = f" | crop {s['aspect'][0]}:{s['aspect'][1]}" if s['crop'] else ""
+            print(f"  • {run['name']:<18} {s['format']} | {target} | Q{s['quality']}{crop} | "
+                  f"(-) {run['analysis']['downscale']} (+) {run['analysis']['upscale']} (=) {run['analysis']['keep']}")
+        if failed_count > 0:
+            print(f"  (!) Unreadable:      {failed_count}")
+        if formats:
+            print(f"  Source Formats:      {', '.join(f'{fmt} {count}' for fmt, count in sorted(formats.items(), key=lambda x: -x[1]))}")
+        print(Fore.CYAN + "─" * 40 + Style.RESET_ALL)
+    else:
         # === Processing Preview ===
         print(f"\n{Fore.CYAN}{Style.BRIGHT}[PREVIEW] PROCESSING PREVIEW:{Style.RESET_ALL}")
         print(f"  • Images to process: {len(image_files)}")
         print(f"  • Output Format:     {settings['format']}")
-        print(f"  • Target Size:       {settings['size']}px (short edge)")
+        if settings.get('responsive'):
+            print(f"  • Target Widths:     {', '.join(v['name'] for v in size_variants)} (one decode, cascaded)")
+        else:
+            print(f"  • Target Size:       {settings['size']}px (short edge)")
         print(f"  • Target Quality:    {settings['quality']}%")
         print(f"  • Crop to Aspect:    {f'{settings['aspect'][0]}:{settings['aspect'][1]}' if settings['crop'] else 'None'}")
         print(f"  • Upscaling:         {'Allowed [OK]' if settings.get('allow_upscale') else 'Prevented [!] '}")
@@ -1064,6 +2442,8 @@ def process_images(input_folder, image_files, settings, mode, is_test=False, cus
         print(f"  (=) Already Target:  {analysis['keep']}")
         if analysis['failed'] > 0:
             print(f"  (!) Unreadable:      {analysis['failed']}")
+        if formats:
+            print(f"  Source Formats:      {', '.join(f'{fmt} {count}' for fmt, count in sorted(formats.items(), key=lambda x: -x[1]))}")
         
         print(Fore.CYAN + "─" * 40 + Style.RESET_ALL)
         
@@ -1086,22 +2466,20 @@ def process_images(input_folder, image_files, settings, mode, is_test=False, cus
             print(f"  Processing {len(image_files)} images may take a few minutes.")
             print(Fore.CYAN + "─" * 40 + Style.RESET_ALL)
     
-    if mode == "Watch":
+    if not interactive:
         proceed = 'y'
     else:
         proceed = input(f"\n{Fore.GREEN}{Style.BRIGHT}Proceed with processing? (y/n) [default y]: {Style.RESET_ALL}").strip().lower()
         
     if proceed not in ('', 'y', 'yes'):
+        for run in runs:
+            run["image_log"].close()
         print(f"{Fore.YELLOW}Processing cancelled.")
         return 
     
     # === Processing Loop ===
     start_processing_time = time.time()
     
-    # Delta Sync Init
-    delta_cache = DeltaSync.load_cache()
-    cache_lock = threading.RLock()
-    
     # Thread-safe progress tracking
     progress_lock = threading.RLock()
     progress_stats = {
@@ -1115,6 +2493,15 @@ def process_images(input_folder, image_files, settings, mode, is_test=False, cus
             current = progress_stats["current"]
             total = total_images
             
+            if total is None:
+                # Streaming: no total yet, show throughput instead
+                elapsed = time.time() - start_processing_time
+                rate = current / elapsed if elapsed > 0 else 0
+                sys.stdout.write("\r" + " " * 100 + "\r")
+                sys.stdout.write(f"{Fore.CYAN}[PROG] {current} images | {rate:.1f} img/s{Style.RESET_ALL}")
+                sys.stdout.flush()
+                return
+            
             percent = 100 * (current / total) if total > 0 else 0
             bar_length = 30
             filled = int(bar_length * current // total) if total > 0 else 0
@@ -1133,310 +2520,157 @@ def process_images(input_folder, image_files, settings, mode, is_test=False, cus
             sys.stdout.write(f"{Fore.CYAN}[PROG] |{bar}| {percent:3.0f}% ({current}/{total}){time_str}{Style.RESET_ALL}")
             sys.stdout.flush()
 
-    # Redefining process_single_image with FULL logic inline to ensure it works
-    def process_item(filename):
-        img_path = os.path.join(input_folder, filename)
-        file_result = {"status": "skipped", "size_kb": 0}
-        
-        try:
-            # === Delta Sync Check ===
-            input_hash = DeltaSync.get_hash(img_path, settings)
-            if input_hash:
-                with cache_lock:
-                    cached_entry = delta_cache.get(input_hash)
-                
-                if cached_entry and os.path.exists(cached_entry['path']):
-                    # COPY existing optimized file
-                    # Handle mirroring for output path
-                    relative_dir = os.path.dirname(filename)
-                    target_dir = os.path.join(output_folder, relative_dir)
-                    if relative_dir:
-                        os.makedirs(target_dir, exist_ok=True)
-                        
-                    new_filename = generate_web_friendly_filename(os.path.basename(filename), settings, session_id)
-                    output_path = os.path.join(target_dir, new_filename)
-                    
-                    try:
-                        shutil.copy2(cached_entry['path'], output_path)
-                        file_size = get_file_size_kb(output_path)
-                        # We simulate "success" result
-                        return {
-                            "status": "success",
-                            "filename": filename,
-                            "original_size": "Cached",
-                            "final_size": "Cached",
-                            "action": "synced (cached)",
-                            "file_size": file_size,
-                            "new_size_kb": file_size,
-                            "log_entry": {
-                                "file": filename,
-                                "original": "Cached",
-                                "result": "Cached",
-                                "action": "synced (cached)",
-                                "size_kb": file_size
-                            },
-                            "terminal_output": f"{Fore.CYAN}[SYNC]{Style.RESET_ALL} {filename:<30} | {'Cached':<10} | {file_size:>6} KB | Delta Sync Restore"
-                        }
-                    except:
-                        pass # if copy fails, re-process
-
-            # Init Check
-            is_cr3 = filename.lower().endswith('.cr3')
-            orientation_value = None
-            working_img_path = img_path
-            temp_to_delete = None
-            
-            if is_cr3:
-                if not HAS_EXIFTOOL:
-                    return {"status": "skipped", "reason": "Exiftool not found for CR3 conversion"}
-                temp_jpg, orientation_value = convert_cr3_to_jpeg(img_path, input_folder)
-                if not temp_jpg:
-                    return {"status": "skipped", "reason": "CR3 extraction failed"}
-                working_img_path = temp_jpg
-                temp_to_delete = temp_jpg
-
-            with Image.open(working_img_path) as img:
-                original_size = img.size
-                original_size_str = f"{original_size[0]}x{original_size[1]}"
-                
-                # Metadata stripping & basic orientation
-                img = apply_exif_orientation(img)
-                
-                # Transparency
-                has_alpha = False
-                if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
-                    has_alpha = True
-                    if settings['format'] in ["JPEG", "BMP", "TIFF"]: # These formats don't support alpha
-                        bg = Image.new("RGB", img.size, (255, 255, 255))
-                        if img.mode == "P":
-                            img = img.convert("RGBA")
-                        bg.paste(img, mask=img.split()[3])
-                        img = bg
-                    else: # For formats like WEBP, PNG, keep alpha
-                        img = img.convert("RGBA")
-                else:
-                    img = img.convert("RGB") # Ensure RGB for non-alpha images
-                
-                # Resize Logic
-                final_short_edge = settings['size']
-                width, height = img.size
-                short_edge = min(width, height)
-                
-                action, emoji_tag, description = get_resize_action_and_emoji(short_edge, final_short_edge, settings.get('allow_upscale', False))
-                resize_info = action # for log string
-                
-                new_img = img.copy() # Start with a copy to avoid modifying original `img`
-                
-                if short_edge <= final_short_edge and not settings.get('allow_upscale', False):
-                    # Keep original size if smaller and upscaling not allowed
-                    resize_info = f"kept at original size"
-                elif short_edge == final_short_edge:
-                    resize_info = f"already target size"
-                else:
-                    # Perform resize
-                    if width < height:
-                        new_width = final_short_edge
-                        new_height = int((final_short_edge / width) * height)
-                    else:
-                        new_height = final_short_edge
-                        new_width = int((final_short_edge / height) * width)
-                    
-                    if short_edge < final_short_edge: # Upscaling
-                        new_img = img.resize((new_width, new_height), Image.BICUBIC)
-                        resize_info = f"upscaled from {short_edge}px"
-                    else: # Downscaling
-                        new_img = img.resize((new_width, new_height), Image.LANCZOS)
-                        resize_info = f"downscaled from {short_edge}px"
-                
-                # Apply cropping
-                crop_info_str = ""
-                if settings['crop']:
-                    new_img = crop_to_ratio_with_anchor(new_img, settings['aspect'], settings['anchor'])
-                    crop_info_str = f" → cropped to {new_img.size[0]}x{new_img.size[1]}"
-                
-                # Save
-                # We only have one variant support active
-                
-                # Handle mirroring if dealing with relative paths
-                relative_dir = os.path.dirname(filename)
-                target_dir = os.path.join(output_folder, relative_dir)
-                if relative_dir:
-                    os.makedirs(target_dir, exist_ok=True)
-                
-                new_filename = generate_web_friendly_filename(os.path.basename(filename), settings, session_id)
-                output_path = os.path.join(target_dir, new_filename)
-                
-                save_kwargs = {"quality": settings['quality'], "optimize": True}
-                if settings['format'] == "WEBP":
-                    save_kwargs["lossless"] = has_alpha
-                    save_kwargs["method"] = 6  # Best compression
-                
-                if settings['format'] in ["JPEG", "PDF", "AVIF"]:
-                    if new_img.mode != "RGB":
-                        new_img = new_img.convert("RGB")
-                
-                # === Smart Quality Validation ===
-                used_quality = settings['quality']
-                smart_tag = ""
-                
-                if settings.get('smart_optimize', False) and settings['format'] in ['JPEG', 'WEBP']:
-                    # Generate Candidate B (Aggressive)
-                    aggressive_q = max(50, used_quality - 15)
-                    # We need to save to buffer to compare re-compressed result vs "ideal" result
-                    # Actually, we should compare: 
-                    # 1. Standard Result (Q85)
-                    # 2. Aggressive Result (Q70)
-                    # And compare them visually. 
-                    # Simpler: Generate Aggressive. Compare Aggressive to RAW New_Img (pre-compression).
-                    
-                    # We can't really compare properly without saving/loading or simulating save.
-                    # Let's save Aggressive to temp.
-                    temp_smart = output_path + ".smart_temp"
-                    try:
-                        save_kwargs_smart = save_kwargs.copy()
-                        save_kwargs_smart['quality'] = aggressive_q
-                        new_img.save(temp_smart, format=settings['format'], **save_kwargs_smart)
-                        
-                        # Load back to compare pixels
-                        with Image.open(temp_smart) as smart_img:
-                             # Compare smart_img vs new_img (in memory)
-                             diff = calculate_rms_diff(new_img, smart_img)
-                             
-                        # Threshold: RMS < 2.5 is usuallly indistinguishable
-                        if diff < 2.5:
-                            # It looks good! Use it.
-                            used_quality = aggressive_q
-                            smart_tag = f" [Smart: Q{aggressive_q} | Diff {diff:.2f}]"
-                            # Move temp to real
-                            shutil.move(temp_smart, output_path)
-                            resize_info += smart_tag
-                        else:
-                            # Too much diff, keep standard
-                            # Delete temp
-                            os.remove(temp_smart)
-                            # Save standard (since we didn't save it yet fully, or we can just save now)
-                            new_img.save(output_path, format=settings['format'], **save_kwargs)
-                            
-                    except:
-                        # Fallback to standard
-                         new_img.save(output_path, format=settings['format'], **save_kwargs)
-                else:
-                    # Standard Save
-                    new_img.save(output_path, format=settings['format'], **save_kwargs)
-                
-                file_size = get_file_size_kb(output_path)
-                
-                # Update Cache
-                if input_hash:
-                    with cache_lock:
-                        delta_cache[input_hash] = {"path": output_path, "timestamp": time.time()}
-
-                file_result = {
-                    "status": "success",
-                    "filename": filename,
-                    "original_size": original_size_str,
-                    "final_size": f"{new_img.width}x{new_img.height}",
-                    "action": action,
-                    "file_size": file_size,
-                    "log_entry": { 
-                        "file": filename, 
-                        "original": original_size_str, 
-                        "result": f"{new_img.width}x{new_img.height}", 
-                        "action": action, 
-                        "size_kb": file_size 
-                    },
-                    "new_size_kb": file_size,
-                    "terminal_output": f"{Fore.GREEN}[OK]{Style.RESET_ALL} {filename:<30} | {new_img.width}x{new_img.height:<10} | {file_size:>6} KB | {description}"
-                }
-
-            if temp_to_delete and os.path.exists(temp_to_delete):
-                try: os.remove(temp_to_delete)
-                except: pass
-                
-            return file_result
-
-        except Exception as e:
-            if temp_to_delete and os.path.exists(temp_to_delete):
-                try: os.remove(temp_to_delete)
-                except: pass
-            return {"status": "failed", "reason": str(e)}
-        finally:
-            with progress_lock:
-                progress_stats["current"] += 1
-                # update_progress()  # Removed: Main thread handles consistent rendering now
-
-    # Execute Thread Pool
-    # We use a modest number of workers (e.g. 4 or 8) 
-    # Python is GIL constrained for CPU but PIL releases GIL for some ops, and IO is beneficial.
-    max_workers = min(32, os.cpu_count() + 4)
-    if is_test: max_workers = 1
-    
-    if mode != "Watch":
-        print(f"\n{Fore.CYAN}[PROG] Starting processing with {max_workers} workers...{Style.RESET_ALL}")
-        update_progress()
+    # Execute Worker Pool
+    # Threads are the default: PIL releases the GIL for some ops, and IO benefits.
+    # The process engine scales GIL-bound work across all cores.
+    engine, max_workers = select_engine(settings)
+    if is_test: engine, max_workers = 'thread', 1
+    
+    # Autotuning sizes the pool to its upper bound and limits the items in flight instead
+    tuner = None
+    if settings.get('autotune') and not settings.get('workers') and not is_test:
+        low, high = get_autotune_bounds(engine, settings)
+        autotune_key = get_autotune_key([run["settings"] for run in runs], engine)
+        tuner = ConcurrencyTuner(load_autotuned_workers(autotune_key) or max_workers, low, high)
+        max_workers = high
+    
+    for run in runs:
+        run["log_data"]["session"]["engine"] = engine
+        run["log_data"]["session"]["max_workers"] = max_workers
+    
+    # Everything a worker needs, kept picklable for the process engine
+    worker_context = {
+        "input_folder": input_folder,
+        "session_id": session_id,
+        "jobs": [{"name": run["name"], "settings": run["settings"], "output_folder": run["output_folder"]} for run in runs]
+    }
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(process_item, f): f for f in image_files}
-        
-        for future in concurrent.futures.as_completed(futures):
-            filename = futures[future]
+    if tuner:
+        print(f"\n{Fore.CYAN}[PROG] Starting processing with {tuner.level} {engine} workers (autotuning {tuner.low}-{tuner.high})...{Style.RESET_ALL}")
+    else:
+        print(f"\n{Fore.CYAN}[PROG] Starting processing with {max_workers} {engine} workers...{Style.RESET_ALL}")
+    update_progress()
+    
+    # Bounded work queue: at most a few tasks per worker are in flight, so a
+    # streamed scan is consumed only as fast as it is processed. Admission is
+    # further capped by the estimated pixel memory of the jobs in flight.
+    max_in_flight = max_workers * 4
+    pending_files = iter_probed(input_folder, image_files, None if streaming else probes, max_in_flight)
+    in_flight = {}
+    total_input_bytes = 0
+    memory_budget = get_memory_budget(settings)
+    working_copies = len({run["settings"]['format'] for run in runs})
+    in_flight_memory = 0
+    peak_memory = 0
+    held = None # Next job, waiting for memory to free up
+    drained = False # every file has been submitted
+    
+    executor, submit = create_executor(engine, max_workers, worker_context)
+    with ExifToolPool.batch(), executor:
+        while True:
+            while len(in_flight) < (tuner.level if tuner else max_in_flight):
+                if held is None:
+                    item = next(pending_files, None)
+                    if item is None:
+                        drained = True
+                        break
+                    f, probe = item
+                    held = (f, probe, estimate_item_memory(probe, working_copies))
+                f, probe, cost = held
+                # A job bigger than the whole budget still runs, but alone
+                if in_flight and in_flight_memory + cost > memory_budget:
+                    break
+                in_flight[submit(f, probe)] = (f, cost)
+                in_flight_memory += cost
+                peak_memory = max(peak_memory, in_flight_memory)
+                held = None
+            if not in_flight:
+                break
             try:
-                res = future.result()
-                if res and res["status"] == "success":
-                    processed_count += 1
-                    total_output_size += res["new_size_kb"]
-                    
-                    # Log to data structure
-                    entry = res["log_entry"]
-                    variant_name = size_variants[0]["name"] or "default"
-                    if variant_name not in log_data["processing"]["images"]:
-                         log_data["processing"]["images"][variant_name] = []
-                    log_data["processing"]["images"][variant_name].append(entry)
-                    
-                    # Update Stats
-                    action = res["action"]
-                    if action == "upscaled": log_data["processing"]["stats"]["upscaled_count"] += 1
-                    elif action == "downscaled": log_data["processing"]["stats"]["downscaled_count"] += 1
-                    else: log_data["processing"]["stats"]["kept_original_size"] += 1
-                    
-                    # Print terminal output for this image (Scrolls up above the bar)
-                    if mode != "Watch":
-                        # Clear bar line, print result, then update_progress will redraw bar at bottom
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            except KeyboardInterrupt:
+                # Ctrl+C: drop queued work so only running items finish before shutdown
+                for future in in_flight:
+                    future.cancel()
+                pending_files.close()
+                for run in runs:
+                    run["image_log"].close()
+                raise
+            
+            for future in done:
+                filename, cost = in_flight.pop(future)
+                in_flight_memory -= cost
+                if tuner:
+                    tuner.completed(cost)
+                with progress_lock:
+                    progress_stats["current"] += 1
+                try:
+                    file_results = future.result()
+                    total_input_bytes += file_results[0].get("input_bytes", 0)
+                    if not any(res["status"] == "success" for res in file_results):
+                        res = file_results[0]
+                        skipped_count += 1
+                        for run in runs:
+                            record_skip(run, filename, res.get('reason', 'Unknown error'))
                         sys.stdout.write("\r" + " " * 100 + "\r")
-                        print(res["terminal_output"])
+                        print(f"{Fore.RED}[SKIP] {filename:<30} | {res.get('reason', 'Unknown error')}")
                         update_progress()
+                        continue
+                    processed_count += 1
+                
+                    # Clear bar line, the results are printed above the bar
+                    sys.stdout.write("\r" + " " * 100 + "\r")
+                    for run, res in zip(runs, file_results):
+                        if res["status"] != "success":
+                            record_skip(run, filename, res.get('reason', 'Unknown error'))
+                            print(f"{Fore.RED}[SKIP] {filename:<30} | {run['name']}: {res.get('reason', 'Unknown error')}")
+                            continue
+                        record_result(run, res)
+                        total_output_size += res["new_size_kb"]
                     
-                else:
+                        # Print terminal output for this image (Scrolls up above the bar)
+                        print(f"{res['terminal_output']} | {run['name']}" if multi_profile else res["terminal_output"])
+                    update_progress()
+                except Exception as exc:
                     skipped_count += 1
-                    log_data["processing"]["stats"]["total_skipped"] += 1
-                    if mode != "Watch":
-                        sys.stdout.write("\r" + " " * 100 + "\r")
-                        print(f"{Fore.RED}[SKIP] {filename:<30} | {res.get('reason', 'Unknown error')}")
-                        update_progress()
-            except Exception as exc:
-                skipped_count += 1
-                log_data["processing"]["stats"]["total_skipped"] += 1
-                if mode != "Watch":
+                    for run in runs:
+                        record_skip(run, filename, str(exc))
                     sys.stdout.write("\r" + " " * 100 + "\r")
                     print(f"{Fore.RED}[ERR]  {filename:<30} | {exc}")
                     update_progress()
+            # The tail of the batch cannot keep every worker busy: stop measuring there
+            if tuner and not drained:
+                tuner.update()
     
-    # Save Delta Cache
-    DeltaSync.save_cache(delta_cache)
+    DeltaSync.close()
     
-    if mode != "Watch":
-        print() # Move to new line after progress finished
+    print() # Move to new line after progress finished
     
     # === Results ===
     processing_time = round(time.time() - start_processing_time, 2)
-    total_input_mb = sum(os.path.getsize(os.path.join(input_folder, f)) for f in image_files) // (1024 * 1024)
+    total_input_mb = total_input_bytes // (1024 * 1024)
+    memory_stats = {
+        "budget_mb": round(memory_budget / (1024 * 1024)),
+        "peak_estimated_mb": round(peak_memory / (1024 * 1024), 1),
+        "peak_rss_mb": get_peak_rss_mb()
+    }
+    for run in runs:
+        run["log_data"]["session"]["memory"] = memory_stats
+    if tuner:
+        for run in runs:
+            run["log_data"]["session"]["autotune"] = tuner.summary()
+        if tuner.history: # a batch too short to measure teaches nothing
+            save_autotuned_workers(autotune_key, tuner)
     compression_ratio = (total_input_mb * 1024 / total_output_size) if total_output_size > 0 else 0
     
-    save_final_log(log_data, settings_path, processing_time, total_input_mb, total_output_size)
-    stats = log_data["processing"]["stats"]
+    for run in runs:
+        run["image_log"].close()
+        save_final_log(run["log_data"], run["settings_path"], processing_time, total_input_mb, run["output_kb"], run.get("stage_timing"))
+    stats = {key: sum(run["log_data"]["processing"]["stats"][key] for run in runs)
+             for key in ("upscaled_count", "downscaled_count", "kept_original_size")}
     
-    if mode != "Watch":
-        print(f"""
+    workers_line = f"\n  • Workers: autotuned to {tuner.best} (started at {tuner.start}, bounds {tuner.low}-{tuner.high})" if tuner else ""
+    print(f"""
 {Fore.GREEN}{Style.BRIGHT}Processing Complete!{Style.RESET_ALL}
 {Fore.CYAN}Session Results:
   • Images processed: {processed_count}
@@ -1445,6 +2679,7 @@ def process_images(input_folder, image_files, settings, mode, is_test=False, cus
   • Total output size: {round(total_output_size / 1024, 2)} MB  
   • Overall compression: {compression_ratio:.1f}:1
   • Processing time: {processing_time}s
+  • Peak memory: {memory_stats['peak_estimated_mb']} MB est. in flight (budget {memory_stats['budget_mb']} MB) | RSS {memory_stats['peak_rss_mb'] if memory_stats['peak_rss_mb'] is not None else 'n/a'} MB{workers_line}
 
 {Fore.YELLOW}Resize Operations:
   (+) Upscaled: {stats['upscaled_count']} images
@@ -1452,145 +2687,644 @@ def process_images(input_folder, image_files, settings, mode, is_test=False, cus
   (=) Kept original: {stats['kept_original_size']} images
 
 {Fore.MAGENTA}Output Location: {output_folder}
-Detailed logs saved: processing_settings.json & processing_settings_summary.txt
+Detailed logs saved: processing_settings.json, processing_settings_summary.txt & {IMAGE_LOG_FILE}
 """)
-    if mode == "Watch":
-        if processed_count > 0:
-            sys.stdout.write(f"{Fore.GREEN}done ({processing_time}s)\n")
-        else:
-            sys.stdout.write(f"{Fore.RED}failed\n")
-        sys.stdout.flush()
-    else:
-        print(f"{Fore.GREEN}[OK] Image processed successfully ({processing_time}s)")
+    if multi_profile:
+        print(f"{Fore.CYAN}Per-Profile Results:")
+        for run in runs:
+            print(f"  • {run['name']:<18} {run['processed']} images | {round(run['output_kb'] / 1024, 2)} MB | {run['output_folder']}")
+    print(f"{Fore.GREEN}[OK] Image processed successfully ({processing_time}s)")
     
     # Open output folder
     if is_test:
         print(f"{Fore.GREEN}[TEST] Test image saved to: {output_folder}")
         open_file_cross_platform(output_folder)
-    elif mode == "Watch":
-        pass # Never auto-open in watch mode
+    elif not interactive:
+        pass # Never auto-open when scripted
     elif input(f"\n{Fore.CYAN}Open output folder? (y/n) [default y]: ").strip().lower() in ('', 'y'):
         open_file_cross_platform(output_folder)
     
-    # Cleanup CR3 temp files
-    temp_cr3_folder = os.path.join('input_images', "temp_cr3")
-    if os.path.exists(temp_cr3_folder):
-        shutil.rmtree(temp_cr3_folder)
-    
-    if mode != "Watch":
-        print(f"{Fore.YELLOW}Thanks for using TerminallyQuick!")
+    print(f"{Fore.YELLOW}Thanks for using TerminallyQuick!")
 
 
 
 # === DeltaSync Engine ===
 class DeltaSync:
-    CACHE_FILE = ".tq_sync"
+    """Content-addressed cache of finished outputs, stored in SQLite (WAL mode).
+    Every worker thread/process holds its own connection and commits entries as
+    it finishes them, so a crash loses nothing and concurrent TerminallyQuick
+    runs on the same folder are safe."""
+    CACHE_FILE = ".tq_sync.db"
+    # Settings that change how a batch runs but never the output pixels
+    RUNTIME_KEYS = ("engine", "restore_strategy", "workers", "stage_timing", "autotune", "autotune_max_workers",
+                    "scan_order", "memory_budget_mb", "watch_quiet_period")
+    # Cache-hit restore chain, fastest first; a setting picks where to start
+    RESTORE_STRATEGIES = ("reflink", "hardlink", "copy")
+    FICLONE = 0x40049409  # Linux ioctl: share extents (Btrfs, XFS, bcachefs...)
+    _no_reflink_devices = set()  # filesystems that refused a clone this session
+    CHUNK_SIZE = 1024 * 1024
+    BUSY_TIMEOUT = 30  # seconds to wait on another writer's lock
+    _local = threading.local()
+
+    @staticmethod
+    def connect():
+        """Per-thread (and per-process) connection, created on first use"""
+        local = DeltaSync._local
+        if getattr(local, "pid", None) != os.getpid() or getattr(local, "path", None) != DeltaSync.CACHE_FILE:
+            conn = sqlite3.connect(DeltaSync.CACHE_FILE, timeout=DeltaSync.BUSY_TIMEOUT)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, path TEXT NOT NULL, timestamp REAL NOT NULL) WITHOUT ROWID")
+                conn.execute("CREATE TABLE IF NOT EXISTS stat_index (stat_key TEXT PRIMARY KEY, digest TEXT NOT NULL) WITHOUT ROWID")
+            local.conn, local.pid, local.path = conn, os.getpid(), DeltaSync.CACHE_FILE
+        return local.conn
 
     @staticmethod
-    def get_hash(filepath, settings):
-        """Generate MD5 hash of file content + settings configuration"""
+    def close():
+        """Checkpoint the WAL into the database and close this thread's connection.
+        Called once a batch's workers are done, so the WAL never outgrows a run."""
+        if os.path.exists(DeltaSync.CACHE_FILE):
+            try:
+                DeltaSync.connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error:
+                pass
+        local = DeltaSync._local
+        if getattr(local, "pid", None) == os.getpid():
+            try:
+                local.conn.close()
+            except sqlite3.Error:
+                pass
+        local.pid = None
+
+    @staticmethod
+    def lookup(key):
+        """Return the cached entry for a cache key, or None"""
         try:
-            hasher = hashlib.md5()
-            # File content (read in 64kb chunks)
-            with open(filepath, 'rb') as f:
-                while chunk := f.read(65536):
-                    hasher.update(chunk)
-            
-            # Mix in settings (convert to sorted string for stability)
-            # We exclude keys that don't affect the image pixels/size to avoid cache misses on metadata changes (like rename?)
-            # But name is not in settings passed here usually.
-            # We must be careful about transient settings. 
-            # Current 'settings' dict seems stable.
-            settings_str = json.dumps(settings, sort_keys=True)
-            hasher.update(settings_str.encode('utf-8'))
-            
-            return hasher.hexdigest()
-        except Exception:
+            row = DeltaSync.connect().execute("SELECT path, timestamp FROM entries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
             return None
+        return {"path": row[0], "timestamp": row[1]} if row else None
 
     @staticmethod
-    def load_cache():
-        if os.path.exists(DeltaSync.CACHE_FILE):
+    def variant_key(key, variant_name):
+        """Cache key for one size variant of an input (the plain key for single-size runs)"""
+        return f"{key}:{variant_name}" if variant_name else key
+
+    @staticmethod
+    def store(key, path):
+        """Commit a finished output immediately"""
+        try:
+            conn = DeltaSync.connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO entries (key, path, timestamp) VALUES (?, ?, ?)", (key, path, time.time()))
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def reflink(src, dst):
+        """Copy-on-write clone: no data is written. Raises OSError if unsupported."""
+        if sys.platform == "darwin":
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+                raise OSError(ctypes.get_errno(), "clonefile failed")
+            return
+        import fcntl  # not available on Windows -> ImportError
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
             try:
-                with open(DeltaSync.CACHE_FILE, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+                fcntl.ioctl(fdst.fileno(), DeltaSync.FICLONE, fsrc.fileno())
+            except OSError:
+                fdst.close()
+                os.remove(dst)
+                raise
 
     @staticmethod
-    def save_cache(cache):
+    def restore(src, dst, strategy="reflink"):
+        """Place a cached output at dst, trying reflink -> hardlink -> copy from
+        the chosen strategy down. Returns the strategy that succeeded ("in place"
+        if dst already is the cached file).
+        The output is built under a temporary name and renamed over dst, so an
+        existing dst is only replaced once the restore has succeeded."""
+        if strategy not in DeltaSync.RESTORE_STRATEGIES:
+            strategy = "reflink"
+        chain = DeltaSync.RESTORE_STRATEGIES[DeltaSync.RESTORE_STRATEGIES.index(strategy):]
         try:
-            with open(DeltaSync.CACHE_FILE, 'w') as f:
-                json.dump(cache, f, indent=2)
-        except:
+            if os.path.samefile(src, dst):
+                return "in place"
+        except OSError:
+            pass # dst does not exist yet
+        tmp_path = dst + ".tmp"
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        dst_device = os.stat(os.path.dirname(dst) or '.').st_dev
+        for method in chain:
+            if method == "reflink" and dst_device in DeltaSync._no_reflink_devices:
+                continue
+            try:
+                if method == "reflink":
+                    try:
+                        DeltaSync.reflink(src, tmp_path)
+                    except (OSError, ImportError, AttributeError):
+                        DeltaSync._no_reflink_devices.add(dst_device)
+                        raise
+                elif method == "hardlink":
+                    os.link(src, tmp_path)
+                else:
+                    shutil.copy2(src, tmp_path)
+                os.replace(tmp_path, dst)
+                return method
+            except (OSError, ImportError, AttributeError):
+                if os.path.lexists(tmp_path):
+                    os.remove(tmp_path)
+                if method == "copy":
+                    raise
+        return None
+
+    @staticmethod
+    def stat_key(filepath, identity=None):
+        """(path, size, mtime_ns, inode) identity of a file, as a string index key.
+        `identity` is (size, mtime_ns, inode) when already known (e.g. from probe_image)."""
+        if identity is None:
+            st = os.stat(filepath)
+            identity = (st.st_size, st.st_mtime_ns, st.st_ino)
+        size, mtime_ns, inode = identity
+        return f"{os.path.abspath(filepath)}|{size}|{mtime_ns}|{inode}"
+
+    @staticmethod
+    def get_content_digest(filepath, timer=NO_TIMER):
+        """128-bit content digest (SHA-256, truncated).
+        SHA-256 is hardware accelerated on current x86 (SHA-NI) and Apple
+        Silicon, where it outpaces both MD5 and BLAKE2b."""
+        hasher = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            while chunk := f.read(DeltaSync.CHUNK_SIZE):
+                hasher.update(chunk)
+                timer.read(len(chunk))
+        return hasher.hexdigest()[:32]
+
+    @staticmethod
+    def lookup_digest(stat_key):
+        try:
+            row = DeltaSync.connect().execute("SELECT digest FROM stat_index WHERE stat_key = ?", (stat_key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    @staticmethod
+    def store_digest(stat_key, digest):
+        try:
+            conn = DeltaSync.connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO stat_index (stat_key, digest) VALUES (?, ?)", (stat_key, digest))
+        except sqlite3.Error:
             pass
 
-def calculate_rms_diff(img1, img2):
-    """Calculate RMS difference between two images"""
-    try:
-        # Ensure same mode/size for comparison
-        if img1.mode != img2.mode:
-            img2 = img2.convert(img1.mode)
-        if img1.size != img2.size:
-            img2 = img2.resize(img1.size, Image.NEAREST)
-            
-        diff_img = ImageChops.difference(img1, img2)
-        stat = ImageStat.Stat(diff_img)
-        # RMS of differences
-        sum_rms = sum(stat.rms) / len(stat.rms)
-        return sum_rms
-    except:
-        return 999.0 # High difference on error
+    @staticmethod
+    def get_hash(filepath, settings, identity=None, timer=NO_TIMER):
+        """Generate the cache key for file content + settings configuration.
+        The content digest comes from the stat index when the file's stat
+        identity is unchanged, so unchanged files are never re-read
+        (a read that does happen is counted on `timer`)."""
+        try:
+            stat_key = DeltaSync.stat_key(filepath, identity)
+            digest = DeltaSync.lookup_digest(stat_key)
+            if digest is None:
+                digest = DeltaSync.get_content_digest(filepath, timer)
+                DeltaSync.store_digest(stat_key, digest)
+            return DeltaSync.settings_key(digest, settings)
+        except Exception:
+            return None
+
+    @staticmethod
+    def settings_key(digest, settings):
+        """Cache key of a content digest under an output configuration"""
+        # Mix in settings (convert to sorted string for stability)
+        # Runtime-only keys are excluded so they never cause cache misses
+        output_settings = {k: v for k, v in settings.items() if k not in DeltaSync.RUNTIME_KEYS}
+        settings_str = json.dumps(output_settings, sort_keys=True)
+        hasher = hashlib.sha256(digest.encode('ascii'))
+        hasher.update(settings_str.encode('utf-8'))
+        return hasher.hexdigest()[:32]
+
+    @staticmethod
+    def is_processed(filepath, settings, identity=None):
+        """True if the file, unchanged since it was indexed, already has an output for
+        these settings. Never reads the file: files the stat index lacks count as unprocessed."""
+        try:
+            digest = DeltaSync.lookup_digest(DeltaSync.stat_key(filepath, identity))
+            if digest is None:
+                return False
+            key = DeltaSync.settings_key(digest, settings)
+            # The plain key (single size) or any "<key>:<variant>" entry (':' < ';')
+            row = DeltaSync.connect().execute(
+                "SELECT path FROM entries WHERE key >= ? AND key < ? LIMIT 1", (key, key + ';')).fetchone()
+        except (OSError, sqlite3.Error):
+            return False
+        return row is not None and os.path.exists(row[0])
+
+def smart_quality_search(img, fmt, save_kwargs, max_quality, min_quality, metric, threshold, max_trials):
+    """Binary search for the lowest quality in [min_quality, max_quality) whose
+    decoded result still passes the metric threshold (see MetricEngine). All
+    trial encodes go to memory buffers.
+    Returns ((quality, encoded_bytes, score) or None, trials)."""
+    def trial(quality):
+        buf = io.BytesIO()
+        img.save(buf, format=fmt, **dict(save_kwargs, quality=quality))
+        buf.seek(0)
+        with Image.open(buf) as candidate:
+            return buf.getvalue(), metric.score(candidate)
+
+    lo, hi = min_quality, max_quality - 1
+    if lo > hi or max_trials < 1:
+        return None, 0
+    # Scores worsen as quality drops: if one step down already fails, nothing lower passes
+    data, diff = trial(hi)
+    trials = 1
+    if not metric.passes(diff, threshold):
+        return None, trials
+    best = (hi, data, diff)
+    hi -= 1
+    while lo <= hi and trials < max_trials:
+        mid = (lo + hi) // 2
+        data, diff = trial(mid)
+        trials += 1
+        if metric.passes(diff, threshold):
+            best = (mid, data, diff)
+            hi = mid - 1
+        else:
+            lo = mid + 1
+    return best, trials
+
+# === Perceptual Metric Engine ===
+# rms/psnr/ssim on luma planes. Thresholds: rms is a ceiling, psnr/ssim are floors.
+METRICS = ("rms", "psnr", "ssim")
+METRIC_THRESHOLDS = {"rms": 2.5, "psnr": 40.0, "ssim": 0.98}
+
+class MetricEngine:
+    """Scores candidate encodes against one reference image.
+    The reference luma plane (and its SSIM statistics) is prepared once and the
+    working buffers are reused for every trial of a quality search.
+    With NumPy, only every `band_step`-th band of SSIM_BLOCK rows is scored: an
+    even sample of the full-resolution score, so the thresholds still hold."""
+    SSIM_BLOCK = 8  # non-overlapping 8x8 windows, averaged in C by Image.reduce
+    SSIM_C1 = (0.01 * 255) ** 2
+    SSIM_C2 = (0.03 * 255) ** 2
+    BAND_STEP = 4  # default: score a quarter of the rows; 1 scores every pixel
+
+    def __init__(self, reference, metric="rms", max_side=0, band_step=BAND_STEP):
+        if metric not in METRICS:
+            metric = "rms"
+        if metric == "ssim" and not load_numpy():
+            metric = "psnr"  # SSIM needs NumPy; PSNR is the closest fallback
+        self.metric = metric
+        self.source_size = reference.size
+        # Optional integer box downsample so the longest side is at most max_side
+        self.reduce_factor = math.ceil(max(reference.size) / max_side) if max_side else 1
+        self.ref_plane = self._luma(reference)
+        # Planes too short for a few bands are scored whole
+        self.band_step = max(1, int(band_step)) if self.ref_plane.size[1] >= 4 * self.SSIM_BLOCK * band_step else 1
+        if load_numpy():
+            self.ref = self._sample(np.asarray(self.ref_plane, dtype=np.float32))
+            self._buf = np.empty_like(self.ref)
+            if metric == "ssim":
+                self.ref_mu = self._block_mean(self.ref)
+                self.ref_var = self._block_mean(self.ref * self.ref) - self.ref_mu ** 2
+
+    def _luma(self, img):
+        if img.mode != "L":
+            # Not-yet-decoded JPEG candidates can decode luma only, skipping color conversion
+            img.draft("L", None)
+        if img.size != self.source_size:
+            # Never compare mismatched geometry pixel-for-pixel; resample properly
+            img = img.resize(self.source_size, Image.BOX)
+        plane = img if img.mode == "L" else img.convert("L")
+        if self.reduce_factor > 1:
+            plane = plane.reduce(self.reduce_factor)
+        return plane
+
+    def _sample(self, a):
+        """Every band_step-th band of SSIM_BLOCK rows of a plane"""
+        if self.band_step == 1:
+            return a
+        rows = a.shape[0] // self.SSIM_BLOCK * self.SSIM_BLOCK
+        return a[:rows].reshape(-1, self.SSIM_BLOCK, a.shape[1])[::self.band_step].reshape(-1, a.shape[1])
+
+    def _block_mean(self, a):
+        """Mean of every SSIM_BLOCK x SSIM_BLOCK block of a float32 plane"""
+        return np.asarray(Image.fromarray(a, "F").reduce(self.SSIM_BLOCK))
+
+    def _rms(self, candidate):
+        if HAS_NUMPY:
+            np.subtract(self._sample(np.asarray(self._luma(candidate))), self.ref, out=self._buf)
+            flat = self._buf.ravel()
+            return math.sqrt(float(np.dot(flat, flat)) / flat.size)
+        diff = ImageChops.difference(self.ref_plane, self._luma(candidate))
+        return ImageStat.Stat(diff).rms[0]
+
+    def _ssim(self, candidate):
+        if min(self.ref.shape) < self.SSIM_BLOCK:
+            return 1.0 if self._rms(candidate) == 0 else 0.0
+        cand = self._sample(np.asarray(self._luma(candidate))).astype(np.float32)
+        mu = self._block_mean(cand)
+        np.multiply(cand, cand, out=self._buf)
+        var = self._block_mean(self._buf) - mu ** 2
+        np.multiply(cand, self.ref, out=self._buf)
+        cov = self._block_mean(self._buf) - mu * self.ref_mu
+        c1, c2 = self.SSIM_C1, self.SSIM_C2
+        ssim_map = ((2 * mu * self.ref_mu + c1) * (2 * cov + c2)) / ((mu ** 2 + self.ref_mu ** 2 + c1) * (var + self.ref_var + c2))
+        return float(ssim_map.mean())
+
+    def score(self, candidate):
+        if self.metric == "ssim":
+            return self._ssim(candidate)
+        rms = self._rms(candidate)
+        if self.metric == "psnr":
+            return 20 * math.log10(255.0 / rms) if rms > 0 else 100.0
+        return rms
+
+    def passes(self, score, threshold):
+        return score < threshold if self.metric == "rms" else score >= threshold
+
+# === Watch Session ===
+class WatchSession:
+    """Long-lived processing state for Watchdog Mode. Observer callbacks only
+    enqueue(): repeated events for a file collapse into one queue entry, a
+    dispatcher thread feeds one executor that lives for the whole session, and
+    every result streams into one session log whose aggregates are rewritten
+    every few seconds.
+    A file is only picked up once written: closed after writing, renamed into
+    place, or unchanged in size and mtime for `watch_quiet_period` seconds."""
+    DEFAULT_QUIET_PERIOD = 0.5 # seconds a file must stay unchanged (no close/rename seen)
+    POLL_INTERVAL = 0.1 # spacing of size/mtime checks while a file is still being written
+    FLUSH_INTERVAL = 5.0
+
+    def __init__(self, input_folder, settings, session_id, output_folder):
+        self.input_folder = input_folder
+        self.settings = settings
+        self.recursive = settings.get('recursive', True)
+        self.quiet_period = float(settings.get('watch_quiet_period', self.DEFAULT_QUIET_PERIOD))
+        os.makedirs(output_folder, exist_ok=True)
+        log_data, settings_path, image_log = setup_logging(output_folder, settings, "Watch")
+        self.run = {"name": settings.get('name', ''), "settings": settings, "output_folder": output_folder,
+                    "log_data": log_data, "settings_path": settings_path, "image_log": image_log,
+                    "processed": 0, "output_kb": 0}
+
+        self.engine, self.max_workers = select_engine(settings)
+        log_data["session"]["engine"] = self.engine
+        log_data["session"]["max_workers"] = self.max_workers
+        self.max_in_flight = self.max_workers * 4
+        self.memory_budget = get_memory_budget(settings)
+
+        self.queue = {}       # relative path -> monotonic time it is due
+        self.heap = []        # (due, relative path); entries superseded in `queue` are skipped
+        self.writes = {}      # relative path -> last event and last close (wall clock), last (size, mtime)
+        self.in_flight = {}   # relative path -> (estimated memory, (size, mtime) being processed)
+        self.processed = {}   # relative path -> (size, mtime) of the version last processed
+        self.requeue = set()  # files that changed again while being processed
+        self.in_flight_memory = 0
+        self.input_bytes = 0
+        self.skipped = 0
+        self.dirty = False
+        self.stopping = False
+        self.started = time.monotonic()
+        self.last_flush = self.started
+        self.cond = threading.Condition()
+
+        context = {"input_folder": input_folder, "session_id": session_id,
+                   "jobs": [{"name": self.run["name"], "settings": settings, "output_folder": output_folder}]}
+        self.executor, self.submit = create_executor(self.engine, self.max_workers, context)
+        self.dispatcher = threading.Thread(target=self._dispatch, name="tq-watch-dispatch", daemon=True)
+
+    def start(self):
+        self.dispatcher.start()
+
+    def enqueue(self, rel_path, closed=False, observed=True):
+        """(Re)schedule a file. Called from observer threads, never blocks on work.
+        `closed` marks a finished write (close after writing, or renamed into place);
+        `observed=False` is a file found by the catch-up scan rather than an event."""
+        with self.cond:
+            state = self.writes.setdefault(rel_path, {"event": 0, "closed_at": None, "signature": None})
+            if observed:
+                state["event"] = time.time()
+            if closed:
+                state["closed_at"] = state["event"]
+            if rel_path in self.in_flight:
+                self.requeue.add(rel_path)
+            else:
+                # After a close, later events (e.g. chmod) need no wait: the mtime tells if it was written again
+                self._schedule(rel_path, 0 if state["closed_at"] else self.POLL_INTERVAL)
+            self.cond.notify_all()
+
+    def discard(self, rel_path):
+        """Forget a queued file that was deleted or renamed away"""
+        with self.cond:
+            self.queue.pop(rel_path, None)
+            self.writes.pop(rel_path, None)
+            self.processed.pop(rel_path, None)
+            self.requeue.discard(rel_path)
+
+    def catch_up(self):
+        """Queue every image already in the folder that DeltaSync has no output for.
+        Called once the observer runs, so files arriving meanwhile are not missed
+        (the queue deduplicates files seen by both). Returns (found, queued)."""
+        found = queued = 0
+        for rel_path in iter_images(self.input_folder, self.recursive):
+            if any(part.startswith('.') for part in rel_path.split(os.sep)):
+                continue
+            found += 1
+            if not DeltaSync.is_processed(os.path.join(self.input_folder, rel_path), self.settings):
+                self.enqueue(rel_path, observed=False)
+                queued += 1
+        return found, queued
+
+    def _schedule(self, rel_path, delay):
+        """Queue a file (or move it) to be checked after `delay` seconds (caller holds the lock)"""
+        due = time.monotonic() + delay
+        self.queue[rel_path] = due
+        heapq.heappush(self.heap, (due, rel_path))
+
+    def _take(self):
+        """Block until the earliest queued file is due and a slot is free (None when stopping)"""
+        with self.cond:
+            while not self.stopping:
+                now = time.monotonic()
+                if self.dirty and now - self.last_flush >= self.FLUSH_INTERVAL:
+                    self._flush()
+                while self.heap and self.queue.get(self.heap[0][1]) != self.heap[0][0]:
+                    heapq.heappop(self.heap) # rescheduled or discarded since
+                timeout = self.FLUSH_INTERVAL
+                if self.heap and len(self.in_flight) < self.max_in_flight:
+                    due, rel_path = self.heap[0]
+                    if due <= now:
+                        heapq.heappop(self.heap)
+                        del self.queue[rel_path]
+                        return rel_path
+                    timeout = min(timeout, due - now)
+                self.cond.wait(timeout)
+        return None
+
+    def _is_written(self, rel_path):
+        """The file's (size, mtime) once it is completely written, else reschedule
+        its next check (None when it no longer exists). False for a file whose
+        content is unchanged since it was last processed: metadata-only events
+        such as the chmod/utime after `cp -p` or rsync never re-process it."""
+        try:
+            st = os.stat(os.path.join(self.input_folder, rel_path))
+        except OSError:
+            with self.cond:
+                self.writes.pop(rel_path, None)
+                self.processed.pop(rel_path, None)
+            return None
+        signature = (st.st_size, st.st_mtime_ns)
+        with self.cond:
+            if rel_path in self.queue:
+                return False # a newer event rescheduled it meanwhile
+            if self.processed.get(rel_path) == signature:
+                self.writes.pop(rel_path, None)
+                return False
+            state = self.writes.setdefault(rel_path, {"event": 0, "closed_at": None, "signature": None})
+            previous, state["signature"] = state["signature"], signature
+            closed = state["closed_at"] is not None and st.st_mtime <= state["closed_at"]
+            # Quiet since both the last event and the last write recorded in the mtime.
+            # A file no event was ever seen for needs no second look once its mtime is old enough.
+            quiet_for = time.time() - max(state["event"], st.st_mtime)
+            unchanged = signature == previous or (previous is None and not state["event"])
+            if closed or (unchanged and quiet_for >= self.quiet_period):
+                del self.writes[rel_path]
+                return signature
+            self._schedule(rel_path, max(self.POLL_INTERVAL, self.quiet_period - quiet_for))
+            self.cond.notify_all()
+            return False
+
+    def _dispatch(self):
+        while True:
+            rel_path = self._take()
+            if rel_path is None:
+                return
+            signature = self._is_written(rel_path)
+            if not signature:
+                continue
+            probe = probe_image(os.path.join(self.input_folder, rel_path))
+            cost = estimate_item_memory(probe)
+            with self.cond:
+                # A job bigger than the whole budget still runs, but alone
+                while self.in_flight and self.in_flight_memory + cost > self.memory_budget and not self.stopping:
+                    self.cond.wait()
+                if self.stopping:
+                    return
+                self.in_flight[rel_path] = (cost, signature)
+                self.in_flight_memory += cost
+            future = self.submit(rel_path, probe)
+            future.add_done_callback(lambda f, rel_path=rel_path: self._finish(rel_path, f))
+
+    def _finish(self, rel_path, future):
+        """Done callback: log the result and free the slot"""
+        try:
+            res = future.result()[0]
+        except concurrent.futures.CancelledError:
+            res = {"status": "skipped", "reason": "Cancelled"}
+        except Exception as e:
+            res = {"status": "failed", "reason": str(e)}
+        with self.cond:
+            cost, signature = self.in_flight.pop(rel_path)
+            self.in_flight_memory -= cost
+            self.input_bytes += res.get("input_bytes", 0)
+            if res["status"] == "success":
+                self.processed[rel_path] = signature
+                record_result(self.run, res)
+                line = f"{Fore.CYAN}[WATCH]{Style.RESET_ALL} {res['terminal_output']}"
+            else:
+                self.skipped += 1
+                record_skip(self.run, rel_path, res.get('reason', 'Unknown error'))
+                line = f"{Fore.RED}[WATCH] Skipped {rel_path}: {res.get('reason', 'Unknown error')}"
+            self.dirty = True
+            if rel_path in self.requeue and not self.stopping:
+                self.requeue.discard(rel_path)
+                self._schedule(rel_path, self.POLL_INTERVAL)
+            self.cond.notify_all()
+        print(line)
+
+    def _flush(self):
+        """Rewrite the session JSON log and summary from the aggregates (caller holds the lock)"""
+        save_final_log(self.run["log_data"], self.run["settings_path"], round(time.monotonic() - self.started, 2),
+                       self.input_bytes // (1024 * 1024), self.run["output_kb"], self.run.get("stage_timing"))
+        self.dirty = False
+        self.last_flush = time.monotonic()
+
+    def stop(self):
+        """Drop queued files, let running ones finish, then write the final log"""
+        with self.cond:
+            self.stopping = True
+            self.queue.clear()
+            self.heap.clear()
+            self.cond.notify_all()
+        self.dispatcher.join()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        DeltaSync.close()
+        ExifToolPool.close()
+        self.run["image_log"].close()
+        with self.cond:
+            self._flush()
 
 # === Watchdog Handler ===
-if HAS_WATCHDOG:
-    class TQWatchHandler(FileSystemEventHandler):
-        def __init__(self, settings, session_id, input_folder):
-            self.settings = settings
-            self.session_id = session_id
-            self.input_folder = input_folder
-            self.output_dir = os.path.join('resized_images', session_id)
-            if not os.path.exists(self.output_dir):
-                os.makedirs(self.output_dir, exist_ok=True)
-            print(f"{Fore.GREEN}[WATCH] Active! Monitoring 'input_images/' for new files...")
-            print(f"{Fore.GREEN}[WATCH] Output: {self.output_dir}")
-            print(f"{Fore.YELLOW}[INFO] Press Ctrl+C to stop watching.")
-
-        def on_created(self, event):
-            if event.is_directory: return
-            filename = os.path.basename(event.src_path)
-            if filename.startswith('.'): return # Ignore hidden files
-            
-            # Wait briefly for file write to complete
-            time.sleep(1.0) 
-            
-            # Basic validation
-            ext = os.path.splitext(filename)[1].lower()
-            if ext in ['.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tiff', '.tif', '.heic', '.avif', '.cr3', '.ico', '.ppm', '.pgm', '.pbm', '.tga']:
-                sys.stdout.write(f"\n{Fore.CYAN}[WATCH] Detected: {filename} ..... ")
-                sys.stdout.flush()
-                
-                # We need to process this single file. 
-                # Reusing process logic is tricky because process_images expects a batch.
-                # However, we can just call process_images with a single file list in a quiet mode?
-                # Or refactor?
-                # For safety and speed, we will invoke process_images with a single file list, 
-                # but we need to ensure it doesn't print the huge header every time.
-                # Let's just suppress stdout temporarily or add a 'quiet' mode?
-                # Actually, verbose is fine! It shows the user what's happening.
-                
-                # Careful: The event.src_path is absolute. process_images expects RELATIVE to input_folder.
-                # input_folder is 'input_images'.
-                # So we pass ['filename'] and input_folder='input_images'.
-                
-                try:
-                    process_images(self.input_folder, [filename], self.settings, "Watch", custom_output_folder=self.output_dir)
-                except Exception as e:
-                    print(f"{Fore.RED}[WATCH] Error processing {filename}: {e}")
+class TQWatchHandler:
+    """Observer callbacks only filter and enqueue; the WatchSession does the work.
+    Implements watchdog's handler contract (dispatch -> on_<event type>) without
+    subclassing FileSystemEventHandler, so watchdog is only imported for watch mode."""
+    def __init__(self, session):
+        self.session = session
+
+    def dispatch(self, event):
+        handler = getattr(self, f"on_{event.event_type}", None)
+        if handler:
+            handler(event)
+
+    def _relative(self, path):
+        """Image path relative to the watched folder; None for hidden, unsupported or outside files"""
+        rel_path = os.path.relpath(path, self.session.input_folder)
+        parts = rel_path.split(os.sep)
+        if parts[0] == '..' or any(part.startswith('.') for part in parts):
+            return None
+        return rel_path if rel_path.lower().endswith(SUPPORTED_EXTS) else None
+
+    def _enqueue(self, path, closed=False):
+        rel_path = self._relative(path)
+        if rel_path:
+            self.session.enqueue(rel_path, closed)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._enqueue(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._enqueue(event.src_path)
+
+    def on_closed(self, event):
+        # Close after writing (inotify): the file is complete, no quiet period needed
+        if not event.is_directory:
+            self._enqueue(event.src_path, closed=True)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            src_path = self._relative(event.src_path)
+            if src_path:
+                self.session.discard(src_path)
+            # Atomic uploads: a temp file renamed into place is complete
+            self._enqueue(event.dest_path, closed=True)
+        elif self.session.recursive:
+            # A folder moved in whole raises no events for the files inside it
+            for rel_path in iter_images(event.dest_path, recursive=True):
+                self._enqueue(os.path.join(event.dest_path, rel_path), closed=True)
+
+    def on_deleted(self, event):
+        rel_path = None if event.is_directory else self._relative(event.src_path)
+        if rel_path:
+            self.session.discard(rel_path)
 
 def run_watchdog_mode(input_folder='input_images'):
-    if not HAS_WATCHDOG:
+    if not load_watchdog():
         print(f"{Fore.RED}[!] Watchdog library not found. Please run: pip install watchdog")
         input("Press Enter to return...")
         return
@@ -1631,18 +3365,29 @@ def run_watchdog_mode(input_folder='input_images'):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     session_id = f"run_WATCHDOG_{timestamp}"
     
-    event_handler = TQWatchHandler(settings, session_id, input_folder)
+    output_dir = os.path.join('resized_images', session_id)
+    session = WatchSession(input_folder, settings, session_id, output_dir)
+    session.start()
     observer = Observer()
-    observer.schedule(event_handler, path=input_folder, recursive=False)
+    # Subfolders are watched and mirrored into the output unless the profile turned mirroring off
+    observer.schedule(TQWatchHandler(session), path=input_folder, recursive=session.recursive)
     observer.start()
+    print(f"{Fore.GREEN}[WATCH] Active! Monitoring '{input_folder}/'{' and its subfolders' if session.recursive else ''} for new files...")
+    print(f"{Fore.GREEN}[WATCH] Output: {output_dir} ({session.max_workers} {session.engine} workers)")
+    print(f"{Fore.YELLOW}[INFO] Press Ctrl+C to stop watching.")
     
     try:
+        # Backlog first: whatever arrived while nothing was watching
+        found, queued = session.catch_up()
+        print(f"{Fore.CYAN}[WATCH] Catch-up: {queued} of {found} existing files need processing")
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
         observer.stop()
         print(f"\n{Fore.YELLOW}[WATCH] Stopping...")
     observer.join()
+    session.stop()
+    print(f"{Fore.GREEN}[WATCH] {session.run['processed']} processed, {session.skipped} skipped. Log: {session.run['settings_path']}")
 
 if __name__ == "__main__":
     try: